@@ -1,18 +1,26 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (JWTManager, create_access_token, create_refresh_token, jwt_required,
+                                get_jwt_identity, get_jwt, get_jti)
 from flask_jwt_extended.exceptions import JWTExtendedException
 from flask_mail import Mail, Message
-from werkzeug.utils import secure_filename
 import bcrypt
 import os
 import uuid
 import time
+import json
+import base64
 import sys
 from datetime import datetime, timedelta
 from itsdangerous import URLSafeTimedSerializer
 import logging
+import threading
+from rate_limit import RequestLimiter
+from revocation import RevocationList
+from profiling import RequestProfiler, profile_span
+from uploads import (UploadError, stream_multipart_upload, create_upload_session,
+                     get_upload_session, receive_upload_chunk)
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO,
@@ -26,12 +34,28 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql://user:password@db:3370/portfolio'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
+# Access tokens are short-lived and validated without the database; refresh tokens rotate and are stored server-side
+app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=15)
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+app.config['REFRESH_TOKEN_PURGE_INTERVAL'] = 60 * 60  # seconds between deletes of expired refresh tokens
 app.config['JWT_TOKEN_LOCATION'] = ['headers']
 app.config['JWT_HEADER_NAME'] = 'Authorization'
 app.config['JWT_HEADER_TYPE'] = 'Bearer'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB max upload
+# Larger images go through resumable upload sessions, in chunks below MAX_CONTENT_LENGTH
+app.config['UPLOAD_MAX_IMAGE_SIZE'] = 10 * 1024 * 1024
+app.config['UPLOAD_CHUNK_SIZE'] = 1024 * 1024
+app.config['UPLOAD_MAX_IMAGE_DIMENSION'] = 10000
+app.config['UPLOAD_MAX_IMAGE_PIXELS'] = 40000000
+app.config['UPLOAD_SESSION_TTL'] = 24 * 60 * 60
+# Contact messages are kept in an inbox and mailed to the owner in digests:
+# one email once BATCH_SIZE messages are waiting, or when the oldest has waited WINDOW seconds
+app.config['CONTACT_DIGEST_BATCH_SIZE'] = int(os.environ.get('CONTACT_DIGEST_BATCH_SIZE', 10))
+app.config['CONTACT_DIGEST_WINDOW'] = int(os.environ.get('CONTACT_DIGEST_WINDOW', 60 * 60))
+app.config['CONTACT_DIGEST_INTERVAL'] = 60  # seconds between digest job runs
+app.config['CONTACT_DIGEST_MAX_MESSAGES'] = 50  # per digest email
+app.config['CONTACT_DIGEST_CLAIM_TIMEOUT'] = 15 * 60  # seconds before a claim left by a dead job is retried
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
 app.config['MAIL_PORT'] = 587
 app.config['MAIL_USE_TLS'] = True
@@ -41,6 +65,22 @@ app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_DEBUG'] = True
 app.config['BASE_URL'] = os.environ.get('BASE_URL', 'http://localhost')
+# Rate limiting: 'memory' keeps buckets per worker, 'shared' coordinates them through the shared store
+app.config['RATELIMIT_BACKEND'] = os.environ.get('RATELIMIT_BACKEND', 'memory')
+# Only these proxies (IPs, CIDRs or hostnames, comma separated) may set the client IP via X-Real-IP
+app.config['RATELIMIT_TRUSTED_PROXIES'] = [p.strip() for p in os.environ.get('RATELIMIT_TRUSTED_PROXIES', '').split(',') if p.strip()]
+app.config['RATELIMIT_RULES'] = {
+    # (requests, period in seconds) per client IP / per account, plus max requests in flight
+    'auth': {'ip': (20, 60), 'account': (10, 300), 'concurrency': 8},   # bcrypt
+    'email': {'ip': (5, 300), 'account': (3, 900), 'concurrency': 4},   # SMTP
+    # Contact messages only hit the database; the owner cap just stops one inbox being flooded
+    'contact': {'ip': (10, 300), 'account': (200, 3600)},
+}
+# Request profiling: send the token in the X-Profile-Request header, or sample a fraction of requests
+app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN')
+app.config['PROFILING_SAMPLE_RATE'] = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR', 'profiles')
+app.config['PROFILING_MAX_PROFILES'] = 50
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -72,7 +112,8 @@ cors = CORS(app,
     resources={r"/api/*": {
         "origins": get_cors_origins(),
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match"],
+        "expose_headers": ["ETag", "Retry-After"],
         "supports_credentials": True
     }}
 )
@@ -80,6 +121,10 @@ cors = CORS(app,
 jwt = JWTManager(app)
 mail = Mail(app)
 serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'])
+# Revoked login sessions, checked in memory on every authenticated request
+revocations = RevocationList()
+limiter = RequestLimiter(app)
+profiler = RequestProfiler(app, db)
 
 # JWT error handlers
 @jwt.invalid_token_loader
@@ -110,22 +155,24 @@ def verification_failed_callback(jwt_header, jwt_payload):
         'error': 'token_verification_failed'
     }), 401
 
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({
+        'message': 'Token has been revoked',
+        'error': 'token_revoked'
+    }), 401
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    # Every token carries its login session id; no database lookup here
+    return revocations.is_revoked(jwt_payload.get('sid'))
+
 # Identity handling
 @jwt.user_identity_loader
 def user_identity_lookup(identity):
     # Always convert user ID to string for consistent handling
     return str(identity)
 
-@jwt.user_lookup_loader
-def user_lookup_callback(_jwt_header, jwt_data):
-    # Convert string ID back to integer for database lookup
-    identity = jwt_data["sub"]
-    try:
-        user_id = int(identity)
-        return User.query.filter_by(id=user_id).one_or_none()
-    except:
-        return None
-
 # Define models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -146,6 +193,56 @@ class Project(db.Model):
     image = db.Column(db.String(255))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+class PortfolioSummary(db.Model):
+    """Denormalized row per portfolio for the public directory, kept up to date by the write handlers"""
+    # Covering indexes so each directory page is an index-only range scan
+    __table_args__ = (
+        db.Index('ix_portfolio_summary_recent', 'updated_at', 'user_id', 'project_count',
+                 'name', 'job_title', 'thumbnail'),
+        db.Index('ix_portfolio_summary_projects', 'project_count', 'user_id', 'updated_at',
+                 'name', 'job_title', 'thumbnail'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100))
+    job_title = db.Column(db.String(100))
+    project_count = db.Column(db.Integer, nullable=False, default=0)
+    thumbnail = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ContactMessage(db.Model):
+    __table_args__ = (
+        db.Index('ix_contact_message_inbox', 'user_id', 'created_at'),
+        db.Index('ix_contact_message_pending', 'digest_batch', 'user_id'),
+        # Undelivered messages only, so the digest job doesn't scan the whole inbox
+        db.Index('ix_contact_message_undelivered', 'digested_at', 'user_id', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(100))
+    email = db.Column(db.String(120))
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Set when a digest job claims the message, cleared again if sending fails
+    digest_batch = db.Column(db.String(36))
+    digest_claimed_at = db.Column(db.DateTime)
+    digested_at = db.Column(db.DateTime)
+
+class RefreshToken(db.Model):
+    """One row per issued refresh token; tokens of the same login share a session_id"""
+    __table_args__ = (
+        db.Index('ix_refresh_token_session', 'session_id'),
+        db.Index('ix_refresh_token_user', 'user_id', 'revoked_at'),
+        db.Index('ix_refresh_token_revoked', 'revoked_at'),
+        db.Index('ix_refresh_token_expires', 'expires_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    session_id = db.Column(db.String(36), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime)  # set when rotated
+    revoked_at = db.Column(db.DateTime)
+
 class PasswordReset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -153,6 +250,125 @@ class PasswordReset(db.Model):
     expires_at = db.Column(db.DateTime, nullable=False)
 
 # Helper functions
+def issue_tokens(user, session_id=None):
+    """Create an access/refresh token pair for a login session (caller commits)"""
+    session_id = session_id or str(uuid.uuid4())
+    # Claims handlers need, so validating a request never requires loading the user
+    access_token = create_access_token(identity=user.id, additional_claims={
+        'sid': session_id,
+        'email': user.email,
+        'name': user.name
+    })
+    refresh_token = create_refresh_token(identity=user.id, additional_claims={'sid': session_id})
+    db.session.add(RefreshToken(
+        jti=get_jti(refresh_token),
+        session_id=session_id,
+        user_id=user.id,
+        expires_at=datetime.utcnow() + app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    ))
+    return access_token, refresh_token
+
+def revoke_sessions(user_id=None, session_id=None):
+    """Revoke login sessions in the database and the in-memory denylist (caller commits)"""
+    now = datetime.utcnow()
+    query = RefreshToken.query.filter(RefreshToken.revoked_at.is_(None))
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    if session_id is not None:
+        query = query.filter_by(session_id=session_id)
+    session_ids = {row.session_id for row in query.with_entities(RefreshToken.session_id).distinct()}
+    if session_id is not None:
+        session_ids.add(session_id)
+    query.update({'revoked_at': now}, synchronize_session=False)
+    
+    # Access tokens outlive their revocation by at most their own lifetime
+    expires_at = time.time() + app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+    for sid in session_ids:
+        revocations.revoke(sid, expires_at)
+    return len(session_ids)
+
+def load_recent_revocations():
+    """Re-populate the denylist with sessions revoked within the access token lifetime"""
+    lifetime = app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    rows = db.session.query(RefreshToken.session_id, db.func.max(RefreshToken.revoked_at))\
+        .filter(RefreshToken.revoked_at >= datetime.utcnow() - lifetime)\
+        .group_by(RefreshToken.session_id).all()
+    for session_id, revoked_at in rows:
+        expires_at = (revoked_at + lifetime - datetime.utcnow()).total_seconds() + time.time()
+        revocations.revoke(session_id, expires_at)
+    if rows:
+        logger.info(f"Loaded {len(rows)} revoked sessions into the denylist")
+
+def purge_expired_refresh_tokens(now=None):
+    """Delete refresh token rows that can no longer be used or matter for revocation.
+
+    Rows are kept for one access token lifetime past their expiry, so a session
+    revoked just before its last token expired is still reloaded by
+    load_recent_revocations after a restart.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    deleted = RefreshToken.query.filter(RefreshToken.expires_at < cutoff)\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        logger.info(f"Purged {deleted} expired refresh tokens")
+    return deleted
+
+def start_refresh_token_purge_worker():
+    """Run purge_expired_refresh_tokens in a background thread every REFRESH_TOKEN_PURGE_INTERVAL seconds"""
+    def run():
+        while True:
+            time.sleep(app.config['REFRESH_TOKEN_PURGE_INTERVAL'])
+            with app.app_context():
+                try:
+                    purge_expired_refresh_tokens()
+                except Exception as e:
+                    logger.error(f"Refresh token purge failed: {str(e)}")
+                    db.session.rollback()
+
+    worker = threading.Thread(target=run, name='refresh-token-purge', daemon=True)
+    worker.start()
+    return worker
+
+def update_portfolio_summary(user, project_delta=0):
+    """Apply a profile or project change to the user's directory row (caller commits)"""
+    now = datetime.utcnow()
+    updated = PortfolioSummary.query.filter_by(user_id=user.id).update({
+        'name': user.name,
+        'job_title': user.job_title,
+        'thumbnail': user.profile_image,
+        'project_count': PortfolioSummary.project_count + project_delta,
+        'updated_at': now
+    }, synchronize_session=False)
+    if not updated:
+        # No row yet (e.g. a new user); build it from the source tables
+        db.session.flush()
+        db.session.add(PortfolioSummary(
+            user_id=user.id,
+            name=user.name,
+            job_title=user.job_title,
+            thumbnail=user.profile_image,
+            project_count=Project.query.filter_by(user_id=user.id).count(),
+            updated_at=now
+        ))
+
+def backfill_portfolio_summaries():
+    """Create directory rows for users that predate the summary table"""
+    missing = User.query.outerjoin(PortfolioSummary, PortfolioSummary.user_id == User.id)\
+        .filter(PortfolioSummary.user_id.is_(None)).all()
+    for user in missing:
+        update_portfolio_summary(user)
+    db.session.commit()
+    if missing:
+        logger.info(f"Backfilled {len(missing)} portfolio summaries")
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
 def hash_password(password):
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
@@ -217,7 +433,8 @@ Portfolio Team"""
         logger.info(f"📤 Using sender: {mail_sender}")
         logger.info(f"📤 SMTP Server: {app.config['MAIL_SERVER']}:{app.config['MAIL_PORT']}")
         
-        mail.send(msg)
+        with profile_span('smtp', 'password reset email'):
+            mail.send(msg)
         logger.info(f"✅ Password reset email sent successfully to {user.email}")
         return True
         
@@ -226,6 +443,101 @@ Portfolio Team"""
         logger.error(f"❌ Error type: {type(e).__name__}")
         return False
 
+def send_contact_digest(user, messages):
+    """Email one digest of contact messages to the portfolio owner"""
+    sender = app.config['MAIL_DEFAULT_SENDER']
+    parts = []
+    for message in messages:
+        parts.append(f"""From: {message.name or 'Anonymous'} <{message.email or 'No email provided'}>
+Received: {message.created_at.strftime('%Y-%m-%d %H:%M')} UTC
+
+{message.message}""")
+    subject = f"{len(messages)} new contact message{'s' if len(messages) != 1 else ''} - Portfolio App"
+    body = f"""Hello {user.name or user.email},
+
+You have new messages from visitors to your portfolio:
+
+""" + "\n\n----------------------------------------\n\n".join(parts) + """
+
+Best regards,
+Portfolio Team"""
+    msg = Message(subject=subject, recipients=[user.email], body=body, sender=sender)
+    mail.send(msg)
+
+def send_contact_digests(now=None):
+    """Send a digest to every owner whose pending messages reached the batch size or time window.
+
+    Messages are claimed with a conditional UPDATE before sending, so several
+    workers running this job never mail the same message twice. Claims still
+    unsent after CONTACT_DIGEST_CLAIM_TIMEOUT (the job died mid-send) count as
+    pending again.
+    """
+    now = now or datetime.utcnow()
+    batch_size = app.config['CONTACT_DIGEST_BATCH_SIZE']
+    window_start = now - timedelta(seconds=app.config['CONTACT_DIGEST_WINDOW'])
+    max_messages = app.config['CONTACT_DIGEST_MAX_MESSAGES']
+    stale_claims = now - timedelta(seconds=app.config['CONTACT_DIGEST_CLAIM_TIMEOUT'])
+    # Delivered messages always carry a batch, so digested_at IS NULL bounds the search
+    pending = db.and_(ContactMessage.digested_at.is_(None),
+                      db.or_(ContactMessage.digest_batch.is_(None),
+                             ContactMessage.digest_claimed_at <= stale_claims))
+
+    due = db.session.query(ContactMessage.user_id)\
+        .filter(pending)\
+        .group_by(ContactMessage.user_id)\
+        .having(db.or_(db.func.count(ContactMessage.id) >= batch_size,
+                       db.func.min(ContactMessage.created_at) <= window_start))\
+        .all()
+
+    sent = 0
+    for (user_id,) in due:
+        batch = str(uuid.uuid4())
+        ids = [row.id for row in db.session.query(ContactMessage.id)
+               .filter(ContactMessage.user_id == user_id, pending)
+               .order_by(ContactMessage.id)
+               .limit(max_messages)]
+        claimed = ContactMessage.query\
+            .filter(ContactMessage.id.in_(ids), pending)\
+            .update({'digest_batch': batch, 'digest_claimed_at': now}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+
+        messages = ContactMessage.query.filter_by(digest_batch=batch).order_by(ContactMessage.id).all()
+        user = User.query.get(user_id)
+        try:
+            with profile_span('smtp', 'contact digest'):
+                send_contact_digest(user, messages)
+        except Exception as e:
+            logger.error(f"Failed to send contact digest to {user.email}: {str(e)}")
+            ContactMessage.query.filter_by(digest_batch=batch)\
+                .update({'digest_batch': None, 'digest_claimed_at': None}, synchronize_session=False)
+            db.session.commit()
+            continue
+
+        ContactMessage.query.filter_by(digest_batch=batch)\
+            .update({'digested_at': now}, synchronize_session=False)
+        db.session.commit()
+        sent += 1
+        logger.info(f"Contact digest with {len(messages)} messages sent to {user.email}")
+    return sent
+
+def start_contact_digest_worker():
+    """Run send_contact_digests in a background thread every CONTACT_DIGEST_INTERVAL seconds"""
+    def run():
+        while True:
+            time.sleep(app.config['CONTACT_DIGEST_INTERVAL'])
+            with app.app_context():
+                try:
+                    send_contact_digests()
+                except Exception as e:
+                    logger.error(f"Contact digest job failed: {str(e)}")
+                    db.session.rollback()
+
+    worker = threading.Thread(target=run, name='contact-digest', daemon=True)
+    worker.start()
+    return worker
+
 # Application-wide error handler
 @app.errorhandler(422)
 def handle_unprocessable_entity(err):
@@ -237,8 +549,19 @@ def handle_unprocessable_entity(err):
         "message": str(err.description)
     }), 422
 
+# Let clients revalidate cached API responses with If-None-Match
+@app.after_request
+def add_etag(response):
+    if (request.method == 'GET' and request.path.startswith('/api/')
+            and response.status_code == 200 and response.mimetype == 'application/json'):
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        response = response.make_conditional(request)
+    return response
+
 # Routes
 @app.route('/api/user/signup', methods=['POST'])
+@limiter.limit('auth', account_field='email')
 def signup():
     try:
         data = request.json
@@ -272,17 +595,20 @@ def signup():
         
         logger.info(f"Creating new user with email: {data['email']}")
         db.session.add(new_user)
+        db.session.flush()
+        update_portfolio_summary(new_user)
+        
+        # Generate access and refresh tokens
+        access_token, refresh_token = issue_tokens(new_user)
         db.session.commit()
         logger.info(f"User created successfully with ID: {new_user.id}")
         
-        # Generate access token
-        access_token = create_access_token(identity=new_user.id)
-        
         response_data = {
             'success': True,
             'message': 'User created successfully',
             'data': {
                 'token': access_token,
+                'refresh_token': refresh_token,
                 'user': {
                     'id': new_user.id,
                     'email': new_user.email,
@@ -303,6 +629,7 @@ def signup():
         }), 500
 
 @app.route('/api/user/login', methods=['POST'])
+@limiter.limit('auth', account_field='email')
 def login():
     try:
         data = request.json
@@ -322,15 +649,17 @@ def login():
                 'error': 'Invalid email or password'
             }), 401
         
-        # Generate access token
-        access_token = create_access_token(identity=user.id)
-        logger.info(f"Generated token for user {user.id}")
+        # Generate access and refresh tokens
+        access_token, refresh_token = issue_tokens(user)
+        db.session.commit()
+        logger.info(f"Generated tokens for user {user.id}")
         
         response_data = {
             'success': True,
             'message': 'Login successful',
             'data': {
             'token': access_token,
+            'refresh_token': refresh_token,
             'user': {
                 'id': user.id,
                 'email': user.email,
@@ -348,7 +677,59 @@ def login():
             'error': 'Login failed'
         }), 500
 
+@app.route('/api/user/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_access_token():
+    """Exchange a refresh token for a new access token and a new refresh token"""
+    try:
+        jwt_data = get_jwt()
+        stored = RefreshToken.query.filter_by(jti=jwt_data['jti']).with_for_update().first()
+        if not stored or stored.revoked_at or stored.expires_at < datetime.utcnow():
+            return jsonify({'success': False, 'error': 'token_revoked'}), 401
+        
+        if stored.used_at:
+            # A rotated token was presented again: assume it leaked and end the whole session
+            logger.warning(f"Refresh token reuse detected for user {stored.user_id}, revoking session")
+            revoke_sessions(session_id=stored.session_id)
+            db.session.commit()
+            return jsonify({'success': False, 'error': 'token_revoked'}), 401
+        
+        user = User.query.get(stored.user_id)
+        if not user:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
+        
+        stored.used_at = datetime.utcnow()
+        access_token, refresh_token = issue_tokens(user, session_id=stored.session_id)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Token refreshed',
+            'data': {
+                'token': access_token,
+                'refresh_token': refresh_token
+            }
+        }), 200
+    except Exception as e:
+        logger.error(f"Token refresh error: {str(e)}")
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': 'Token refresh failed'
+        }), 500
+
+@app.route('/api/user/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the session of the presented access or refresh token"""
+    session_id = get_jwt().get('sid')
+    if session_id:
+        revoke_sessions(session_id=session_id)
+        db.session.commit()
+    return jsonify({'success': True, 'message': 'Logged out'}), 200
+
 @app.route('/api/user/forgot-password', methods=['POST'])
+@limiter.limit('email', account_field='email')
 def forgot_password():
     data = request.json
     
@@ -378,7 +759,10 @@ def reset_password():
     # Delete all reset tokens for this user
     PasswordReset.query.filter_by(user_id=user.id).delete()
     
+    # Sign out every existing session
+    revoked = revoke_sessions(user_id=user.id)
     db.session.commit()
+    logger.info(f"Password reset for user {user.id}, revoked {revoked} sessions")
     
     return jsonify({'message': 'Password reset successfully'}), 200
 
@@ -386,7 +770,7 @@ def reset_password():
 @jwt_required()
 def get_profile():
     try:
-        # Use the current_user from JWT extension (set by user_lookup_loader)
+        # The user id comes from the token; the user row is loaded below
         current_user = get_jwt_identity()
         logger.info(f"Get profile for user ID: {current_user}")
         
@@ -423,28 +807,20 @@ def update_profile():
         
         # Check if the request has form data (for file uploads)
         if request.content_type and 'multipart/form-data' in request.content_type:
-            # Handle form data with file upload
-            if 'name' in request.form:
-                user.name = request.form.get('name')
-            if 'job_title' in request.form:
-                user.job_title = request.form.get('job_title')
-            if 'bio' in request.form:
-                user.bio = request.form.get('bio')
+            # Handle form data with file upload, streamed straight to the uploads folder
+            form, uploads = stream_multipart_upload(request, {'profile_image': ''})
+            if 'name' in form:
+                user.name = form.get('name')
+            if 'job_title' in form:
+                user.job_title = form.get('job_title')
+            if 'bio' in form:
+                user.bio = form.get('bio')
             
             # Handle profile image upload
-            if 'profile_image' in request.files:
-                file = request.files['profile_image']
-                if file and file.filename:
-                    # Secure the filename
-                    filename = secure_filename(file.filename)
-                    # Create a unique filename with timestamp
-                    unique_filename = f"{int(time.time())}_{filename}"
-                    # Save the file
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-                    # Update user profile with image path
-                    user.profile_image = unique_filename
-                    logger.info(f"Saved profile image: {unique_filename}")
+            if 'profile_image' in uploads:
+                upload = uploads['profile_image']
+                user.profile_image = upload.filename
+                logger.info(f"Saved profile image: {upload.filename} (sha256 {upload.sha256})")
         else:
             # Handle regular JSON data
             data = request.json
@@ -460,6 +836,7 @@ def update_profile():
             if 'profile_image' in data and data['profile_image']:
                 user.profile_image = data['profile_image']
         
+        update_portfolio_summary(user)
         db.session.commit()
         
         return jsonify({
@@ -471,6 +848,9 @@ def update_profile():
             'bio': user.bio,
             'profile_image': user.profile_image
         }), 200
+    except UploadError as e:
+        logger.warning(f"Rejected profile image upload: {e.message}")
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         logger.error(f"Error updating profile: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -509,27 +889,18 @@ def add_project():
         
         # Check if the request has form data (for file uploads)
         if request.content_type and 'multipart/form-data' in request.content_type:
-            # Handle form data with file upload
-            name = request.form.get('name')
-            demo_url = request.form.get('demo_url', '')
-            repo_url = request.form.get('repo_url', '')
-            description = request.form.get('description', '')
+            # Handle form data with file upload, streamed straight to the uploads folder
+            form, uploads = stream_multipart_upload(request, {'image': 'project_'})
+            name = form.get('name')
+            demo_url = form.get('demo_url', '')
+            repo_url = form.get('repo_url', '')
+            description = form.get('description', '')
             
             # Process image if included
             image_filename = ''
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename:
-                    # Secure the filename
-                    filename = secure_filename(file.filename)
-                    # Create a unique filename with timestamp
-                    unique_filename = f"project_{int(time.time())}_{filename}"
-                    # Save the file
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-                    # Set image filename
-                    image_filename = unique_filename
-                    logger.info(f"Saved project image: {unique_filename}")
+            if 'image' in uploads:
+                image_filename = uploads['image'].filename
+                logger.info(f"Saved project image: {image_filename} (sha256 {uploads['image'].sha256})")
             
             new_project = Project(
                 name=name,
@@ -553,6 +924,7 @@ def add_project():
             )
         
         db.session.add(new_project)
+        update_portfolio_summary(user, project_delta=1)
         db.session.commit()
         
         return jsonify({
@@ -564,6 +936,9 @@ def add_project():
             'description': new_project.description,
             'image': new_project.image
         }), 201
+    except UploadError as e:
+        logger.warning(f"Rejected project image upload: {e.message}")
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         logger.error(f"Error adding project: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -580,30 +955,21 @@ def update_project(project_id):
         
         # Check if the request has form data (for file uploads)
         if request.content_type and 'multipart/form-data' in request.content_type:
-            # Handle form data with file upload
-            if 'name' in request.form:
-                project.name = request.form.get('name')
-            if 'demo_url' in request.form:
-                project.demo_url = request.form.get('demo_url', '')
-            if 'repo_url' in request.form:
-                project.repo_url = request.form.get('repo_url', '')
-            if 'description' in request.form:
-                project.description = request.form.get('description', '')
+            # Handle form data with file upload, streamed straight to the uploads folder
+            form, uploads = stream_multipart_upload(request, {'image': 'project_'})
+            if 'name' in form:
+                project.name = form.get('name')
+            if 'demo_url' in form:
+                project.demo_url = form.get('demo_url', '')
+            if 'repo_url' in form:
+                project.repo_url = form.get('repo_url', '')
+            if 'description' in form:
+                project.description = form.get('description', '')
             
             # Process image if included
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename:
-                    # Secure the filename
-                    filename = secure_filename(file.filename)
-                    # Create a unique filename with timestamp
-                    unique_filename = f"project_{int(time.time())}_{filename}"
-                    # Save the file
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-                    # Update project with image path
-                    project.image = unique_filename
-                    logger.info(f"Saved project image: {unique_filename}")
+            if 'image' in uploads:
+                project.image = uploads['image'].filename
+                logger.info(f"Saved project image: {project.image} (sha256 {uploads['image'].sha256})")
         else:
             # Handle JSON data
             data = request.json
@@ -614,6 +980,7 @@ def update_project(project_id):
             project.description = data.get('description', project.description)
             project.image = data.get('image', project.image)
         
+        update_portfolio_summary(project.user)
         db.session.commit()
         
         return jsonify({
@@ -627,6 +994,9 @@ def update_project(project_id):
                 'image': project.image
             }
         }), 200
+    except UploadError as e:
+        logger.warning(f"Rejected project image upload: {e.message}")
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         logger.error(f"Error updating project: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -640,7 +1010,9 @@ def delete_project(project_id):
     if not project:
         return jsonify({'error': 'Project not found or unauthorized'}), 404
     
+    user = project.user
     db.session.delete(project)
+    update_portfolio_summary(user, project_delta=-1)
     db.session.commit()
     
     return jsonify({'message': 'Project deleted successfully'}), 200
@@ -673,7 +1045,67 @@ def get_portfolio(user_id):
         'projects': projects
     }), 200
 
+@app.route('/api/portfolios/directory', methods=['GET'])
+def get_portfolio_directory():
+    """List portfolios from the summary table with keyset pagination.
+
+    `sort` is `recent` (last updated first) or `projects` (most projects first);
+    pass the returned `next_cursor` as `cursor` to fetch the following page.
+    """
+    sort = request.args.get('sort', 'recent')
+    if sort not in ('recent', 'projects'):
+        return jsonify({'error': 'sort must be "recent" or "projects"'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    sort_column = PortfolioSummary.updated_at if sort == 'recent' else PortfolioSummary.project_count
+    query = db.session.query(
+        PortfolioSummary.user_id,
+        PortfolioSummary.name,
+        PortfolioSummary.job_title,
+        PortfolioSummary.project_count,
+        PortfolioSummary.thumbnail,
+        PortfolioSummary.updated_at
+    )
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_value, last_user_id = decode_cursor(cursor)
+            if sort == 'recent':
+                last_value = datetime.fromisoformat(last_value)
+            else:
+                last_value = int(last_value)
+            last_user_id = int(last_user_id)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(db.or_(
+            sort_column < last_value,
+            db.and_(sort_column == last_value, PortfolioSummary.user_id < last_user_id)
+        ))
+    
+    rows = query.order_by(sort_column.desc(), PortfolioSummary.user_id.desc()).limit(limit + 1).all()
+    
+    portfolios = []
+    for row in rows[:limit]:
+        portfolios.append({
+            'user_id': row.user_id,
+            'name': row.name,
+            'job_title': row.job_title,
+            'project_count': row.project_count,
+            'thumbnail': row.thumbnail,
+            'updated_at': row.updated_at.isoformat()
+        })
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        last_value = last.updated_at.isoformat() if sort == 'recent' else last.project_count
+        next_cursor = encode_cursor([last_value, last.user_id])
+    
+    return jsonify({'portfolios': portfolios, 'next_cursor': next_cursor}), 200
+
 @app.route('/api/contact', methods=['POST'])
+@limiter.limit('contact', account_field='user_id')
 def contact():
     data = request.json
     
@@ -681,19 +1113,93 @@ def contact():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    # Send email
-    subject = f"Contact from {data.get('name', 'Anonymous')}"
-    body = f"From: {data.get('email', 'No email provided')}\n\n{data.get('message', 'No message')}"
-    
-    sender = app.config['MAIL_DEFAULT_SENDER']
-    msg = Message(subject=subject, recipients=[user.email], body=body, sender=sender)
+    # Store in the owner's inbox; the digest job emails it later
+    message = ContactMessage(
+        user_id=user.id,
+        name=(data.get('name') or 'Anonymous')[:100],
+        email=(data.get('email') or '')[:120],
+        message=data.get('message') or 'No message'
+    )
     try:
-        mail.send(msg)
-        logger.info(f"Contact message sent to {user.email}")
+        db.session.add(message)
+        db.session.commit()
+        logger.info(f"Contact message {message.id} stored for user {user.id}")
         return jsonify({'message': 'Message sent successfully'}), 200
     except Exception as e:
-        logger.error(f"Failed to send contact email: {str(e)}")
-        return jsonify({'error': f'Failed to send email: {str(e)}'}), 500
+        logger.error(f"Failed to store contact message: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': f'Failed to send message: {str(e)}'}), 500
+
+@app.route('/api/user/messages', methods=['GET'])
+@jwt_required()
+def get_messages():
+    """Page through the current user's contact inbox, newest first"""
+    current_user_id = int(get_jwt_identity())
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    pagination = ContactMessage.query\
+        .filter_by(user_id=current_user_id)\
+        .order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())\
+        .paginate(page=page, per_page=per_page, max_per_page=100, error_out=False)
+    
+    messages = []
+    for message in pagination.items:
+        messages.append({
+            'id': message.id,
+            'name': message.name,
+            'email': message.email,
+            'message': message.message,
+            'created_at': message.created_at.isoformat(),
+            'emailed_at': message.digested_at.isoformat() if message.digested_at else None
+        })
+    
+    return jsonify({
+        'messages': messages,
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'pages': pagination.pages
+    }), 200
+
+# Resumable uploads for large images
+@app.route('/api/user/uploads', methods=['POST'])
+@jwt_required()
+def start_upload():
+    """Open a resumable image upload; the stored filename can then be set as profile_image or image"""
+    current_user_id = int(get_jwt_identity())
+    data = request.json or {}
+    prefix = 'project_' if data.get('purpose') == 'project' else ''
+    try:
+        session = create_upload_session(current_user_id, data.get('filename'), data.get('size'),
+                                        prefix=prefix, sha256=data.get('sha256'))
+        logger.info(f"Started upload {session['upload_id']} of {session['size']} bytes for user {current_user_id}")
+        return jsonify(session), 201
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+
+@app.route('/api/user/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def upload_status(upload_id):
+    """Report how many bytes of an upload have been received, so the client can resume"""
+    try:
+        return jsonify(get_upload_session(upload_id, int(get_jwt_identity()))), 200
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+
+@app.route('/api/user/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """Receive the next chunk of an upload (raw body with a Content-Range header)"""
+    try:
+        result = receive_upload_chunk(upload_id, int(get_jwt_identity()), request)
+        if result['complete']:
+            logger.info(f"Completed upload {upload_id}: {result['filename']} (sha256 {result['sha256']})")
+            return jsonify(result), 201
+        return jsonify(result), 200
+    except UploadError as e:
+        logger.warning(f"Rejected chunk for upload {upload_id}: {e.message}")
+        return jsonify({'error': e.message}), e.status
 
 # Route to serve uploaded files
 @app.route('/uploads/<path:filename>', methods=['GET'])
@@ -732,6 +1238,9 @@ def initialize_database(max_retries=30, retry_interval=10):
             # Thử kết nối và tạo tables
             with app.app_context():
                 db.create_all()
+                backfill_portfolio_summaries()
+                purge_expired_refresh_tokens()
+                load_recent_revocations()
             
             logger.info("✅ Kết nối thành công! Đã tạo xong các bảng.")
             return True
@@ -757,6 +1266,11 @@ if __name__ == '__main__':
         logger.error("Không thể kết nối tới cơ sở dữ liệu sau nhiều lần thử. Ứng dụng sẽ thoát.")
         sys.exit(1)
     
+    # Gửi email tổng hợp tin nhắn liên hệ trong nền
+    start_contact_digest_worker()
+    # Xóa các refresh token đã hết hạn định kỳ
+    start_refresh_token_purge_worker()
+    
     # Khởi động ứng dụng Flask
     logger.info("🚀 Khởi động Flask server...")
     app.run(host='0.0.0.0', port=7331, debug=True) 
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries the admin ``X-Profile-Request`` header
+matching ``PROFILING_TOKEN``, or when it is picked by ``PROFILING_SAMPLE_RATE``.
+While profiled, a background thread samples the request thread's Python stack;
+SQL statements and SMTP sends show up as extra leaf frames on the samples taken
+while they run. Each profile is written as a collapsed-stack file (for
+flamegraph.pl) and a speedscope JSON file into a bounded on-disk ring.
+
+When neither trigger is configured no hooks are installed at all.
+"""
+import glob
+import hmac
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Request'
+
+
+class RequestProfile:
+    """Samples one thread's stack until stopped"""
+
+    def __init__(self, name, thread_id, interval):
+        self.name = name
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.spans = []
+        self.active_span = None
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{name}", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            span = self.active_span
+            if span is not None:
+                stack.append((f"[{span[0]}] {span[1]}", '', 0))
+            self.samples[tuple(stack)] += 1
+
+    @contextmanager
+    def span(self, kind, label):
+        previous = self.active_span
+        self.active_span = (kind, label)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((kind, label, time.perf_counter() - start))
+            self.active_span = previous
+
+    def collapsed(self):
+        """Folded stacks, one ``frame;frame;frame count`` line per unique stack"""
+        lines = []
+        for stack, count in self.samples.items():
+            names = [name if not filename else f"{name} ({os.path.basename(filename)}:{line})"
+                     for name, filename, line in stack]
+            lines.append(f"{';'.join(n.replace(';', ',') for n in names)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self):
+        """Sampled profile in the speedscope file format"""
+        frame_index = {}
+        frames = []
+        samples = []
+        weights = []
+        interval_ms = self.interval * 1000
+        for stack, count in self.samples.items():
+            indices = []
+            for name, filename, line in stack:
+                key = (name, filename, line)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frame = {'name': name}
+                    if filename:
+                        frame['file'] = filename
+                        frame['line'] = line
+                    frames.append(frame)
+                indices.append(frame_index[key])
+            samples.append(indices)
+            weights.append(count * interval_ms)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.name,
+            'exporter': 'portfolio-backend',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+def current_profile():
+    """The profile attached to the current request, if any"""
+    if not has_app_context():
+        return None
+    return g.get('_request_profile')
+
+
+@contextmanager
+def profile_span(kind, label):
+    """Mark a block (e.g. an SMTP send) so it shows up in the request's profile"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    with profile.span(kind, label):
+        yield
+
+
+class ProfileRing:
+    """Writes profiles to a directory, keeping only the newest `max_profiles`"""
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def write(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        # Names sort oldest-first so trimming can drop from the front
+        profile_id = (f"{time.strftime('%Y%m%d-%H%M%S')}_{next(self._sequence):06d}"
+                      f"_{uuid.uuid4().hex[:8]}")
+        base = os.path.join(self.directory, profile_id)
+        with open(f"{base}.collapsed.txt", 'w') as f:
+            f.write(profile.collapsed())
+        with open(f"{base}.speedscope.json", 'w') as f:
+            json.dump(profile.speedscope(), f)
+        self._trim()
+        return profile_id
+
+    def _trim(self):
+        with self._lock:
+            profiles = sorted(glob.glob(os.path.join(self.directory, '*.speedscope.json')))
+            for path in profiles[:-self.max_profiles] if self.max_profiles else profiles:
+                prefix = path[:-len('.speedscope.json')]
+                for stale in (path, f"{prefix}.collapsed.txt"):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+
+
+class RequestProfiler:
+    """Flask extension wiring request profiling into the app"""
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.ring = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING_TOKEN', None)
+        app.config.setdefault('PROFILING_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILING_INTERVAL', 0.001)
+        app.config.setdefault('PROFILING_DIR', 'profiles')
+        app.config.setdefault('PROFILING_MAX_PROFILES', 50)
+
+        self.token = app.config['PROFILING_TOKEN']
+        self.sample_rate = float(app.config['PROFILING_SAMPLE_RATE'] or 0)
+        if not self.token and self.sample_rate <= 0:
+            return
+
+        self.interval = float(app.config['PROFILING_INTERVAL'])
+        self.ring = ProfileRing(app.config['PROFILING_DIR'], int(app.config['PROFILING_MAX_PROFILES']))
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        if self.db is not None:
+            self._install_sql_hooks()
+        logger.info(f"Request profiling enabled (sample rate {self.sample_rate})")
+
+    def _wants_profile(self):
+        header = request.headers.get(PROFILE_HEADER)
+        if header and self.token and hmac.compare_digest(header, self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._wants_profile():
+            return
+        name = f"{request.method} {request.path}"
+        profile = RequestProfile(name, threading.get_ident(), self.interval)
+        g._request_profile = profile
+        profile.start()
+
+    def _finish(self, response):
+        profile = g.pop('_request_profile', None)
+        if profile is None:
+            return response
+        profile.stop()
+        try:
+            profile_id = self.ring.write(profile)
+            response.headers['X-Profile-Id'] = profile_id
+            sql_time = sum(d for kind, _, d in profile.spans if kind == 'sql')
+            sql_count = sum(1 for kind, _, _ in profile.spans if kind == 'sql')
+            logger.info(f"Profiled {profile.name} in {profile.duration * 1000:.1f}ms "
+                        f"({sql_count} SQL statements, {sql_time * 1000:.1f}ms) -> {profile_id}")
+        except Exception as e:
+            logger.error(f"Failed to write request profile: {str(e)}")
+        return response
+
+    def _teardown(self, exc):
+        # after_request is skipped on unhandled errors; make sure the sampler stops
+        profile = g.pop('_request_profile', None)
+        if profile is not None:
+            profile.stop()
+
+    def _install_sql_hooks(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            profile = current_profile()
+            if profile is not None:
+                span = profile.span('sql', ' '.join(statement.split())[:120])
+                span.__enter__()
+                conn.info.setdefault('_profile_spans', []).append(span)
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            spans = conn.info.get('_profile_spans')
+            if spans:
+                spans.pop().__exit__(None, None, None)
+
+        @event.listens_for(Engine, 'handle_error')
+        def _handle_error(context):
+            spans = context.connection.info.get('_profile_spans') if context.connection else None
+            if spans:
+                spans.pop().__exit__(None, None, None)
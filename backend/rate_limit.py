@@ -0,0 +1,255 @@
+"""
+Admission control for expensive endpoints: token-bucket rate limiting keyed by
+client IP and account, plus per-endpoint-class concurrency gates.
+"""
+import ipaddress
+import logging
+import math
+import socket
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBucketBackend:
+    """Keeps token buckets in this process' memory, evicting the least recently used"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            while len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+class SharedStoreBucketBackend:
+    """Keeps token buckets in a shared store so limits hold across workers"""
+
+    lock_stripes = 64
+
+    def __init__(self, store, prefix='ratelimit'):
+        self.store = store
+        self.prefix = prefix
+
+    def take(self, key, capacity, refill_rate, now):
+        store_key = f"{self.prefix}:{key}"
+        stripe = zlib.crc32(store_key.encode('utf-8')) % self.lock_stripes
+        with self.store.lock(f"{self.prefix}:lock:{stripe}"):
+            tokens, updated = self.store.get(store_key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Once the bucket would be full again the entry carries no information
+            ttl = max(1, math.ceil((capacity - tokens) / refill_rate))
+            self.store.set(store_key, (tokens, now), ttl=ttl)
+        return allowed, tokens
+
+
+class TokenBucket:
+    """Allows `capacity` requests in a burst, refilled at `capacity / period` per second"""
+
+    def __init__(self, backend, name, capacity, period):
+        self.backend = backend
+        self.name = name
+        self.capacity = capacity
+        self.refill_rate = capacity / float(period)
+
+    def consume(self, key):
+        """Take one token for `key`; returns (allowed, retry_after_seconds)"""
+        allowed, tokens = self.backend.take(f"{self.name}:{key}", self.capacity,
+                                            self.refill_rate, time.time())
+        if allowed:
+            return True, 0
+        return False, max(1, math.ceil((1 - tokens) / self.refill_rate))
+
+
+class ConcurrencyGate:
+    """Caps how many requests of one endpoint class run at the same time"""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self):
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        self._semaphore.release()
+
+
+class TrustedProxies:
+    """Addresses allowed to report the client IP through X-Real-IP.
+
+    Entries are IPs, CIDR ranges or hostnames (e.g. the ``nginx`` compose
+    service); hostnames are re-resolved at most every `resolve_interval` seconds.
+    """
+
+    def __init__(self, entries, resolve_interval=60):
+        self.networks = []
+        self.hostnames = []
+        for entry in entries:
+            try:
+                self.networks.append(ipaddress.ip_network(entry, strict=False))
+            except ValueError:
+                self.hostnames.append(entry)
+        self.resolve_interval = resolve_interval
+        self._resolved = set()
+        self._resolved_at = 0.0
+
+    def _hostname_addresses(self):
+        now = time.time()
+        if self.hostnames and now - self._resolved_at >= self.resolve_interval:
+            resolved = set()
+            for hostname in self.hostnames:
+                try:
+                    resolved.update(info[4][0] for info in socket.getaddrinfo(hostname, None))
+                except OSError:
+                    pass
+            self._resolved = resolved
+            self._resolved_at = now
+        return self._resolved
+
+    def __contains__(self, address):
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        if any(ip in network for network in self.networks):
+            return True
+        return address in self._hostname_addresses()
+
+
+def client_ip():
+    """The caller's address; X-Real-IP is only honoured from a trusted proxy"""
+    remote_addr = request.remote_addr or 'unknown'
+    trusted = current_app.extensions.get('request_limiter_proxies')
+    if trusted and remote_addr in trusted:
+        forwarded = request.headers.get('X-Real-IP')
+        if forwarded:
+            return forwarded.strip()
+    return remote_addr
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({'success': False, 'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(int(retry_after))
+    return response
+
+
+class RequestLimiter:
+    """Applies rate limits and concurrency gates to routes by endpoint class.
+
+    Rules come from ``app.config['RATELIMIT_RULES']``, keyed by endpoint class::
+
+        {'auth': {'ip': (20, 60), 'account': (5, 60), 'concurrency': 4}}
+
+    where ``ip``/``account`` are ``(requests, period_seconds)`` token buckets
+    and ``concurrency`` is the number of requests allowed in flight at once.
+    """
+
+    def __init__(self, app=None, store=None):
+        self.store = store
+        self.backend = None
+        self.buckets = {}
+        self.gates = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_BACKEND', 'memory')
+        # Proxies whose X-Real-IP header is believed; by default none are
+        app.config.setdefault('RATELIMIT_TRUSTED_PROXIES', [])
+        app.config.setdefault('RATELIMIT_RULES', {})
+        app.extensions['request_limiter_proxies'] = TrustedProxies(app.config['RATELIMIT_TRUSTED_PROXIES'])
+
+        if app.config['RATELIMIT_BACKEND'] == 'shared':
+            if self.store is None:
+                from shared_store import shared_store
+                self.store = shared_store
+            self.backend = SharedStoreBucketBackend(self.store)
+        else:
+            self.backend = MemoryBucketBackend()
+
+        self.buckets = {}
+        self.gates = {}
+        for endpoint_class, rule in app.config['RATELIMIT_RULES'].items():
+            for scope in ('ip', 'account'):
+                if rule.get(scope):
+                    capacity, period = rule[scope]
+                    self.buckets[(endpoint_class, scope)] = TokenBucket(
+                        self.backend, f"{endpoint_class}:{scope}", capacity, period)
+            if rule.get('concurrency'):
+                self.gates[endpoint_class] = ConcurrencyGate(endpoint_class, rule['concurrency'])
+            logger.info(f"Rate limit rule for {endpoint_class}: {rule}")
+
+    def check(self, endpoint_class, account=None):
+        """Returns a rejection response if the request must be refused, else None"""
+        ip_bucket = self.buckets.get((endpoint_class, 'ip'))
+        if ip_bucket:
+            allowed, retry_after = ip_bucket.consume(client_ip())
+            if not allowed:
+                return _reject(429, 'Too many requests, please try again later', retry_after)
+
+        account_bucket = self.buckets.get((endpoint_class, 'account'))
+        if account_bucket and account:
+            allowed, retry_after = account_bucket.consume(str(account).strip().lower())
+            if not allowed:
+                return _reject(429, 'Too many requests for this account, please try again later',
+                               retry_after)
+        return None
+
+    def limit(self, endpoint_class, account_field=None):
+        """Decorator: reject over-limit callers before the view does any work.
+
+        `account_field` names the JSON body field used as the per-account key.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not current_app.config.get('RATELIMIT_ENABLED'):
+                    return view(*args, **kwargs)
+
+                account = None
+                if account_field:
+                    data = request.get_json(silent=True)
+                    if isinstance(data, dict):
+                        account = data.get(account_field)
+
+                rejection = self.check(endpoint_class, account)
+                if rejection is not None:
+                    logger.warning(f"Rate limited {endpoint_class} request from {client_ip()}")
+                    return rejection
+
+                gate = self.gates.get(endpoint_class)
+                if gate is None:
+                    return view(*args, **kwargs)
+                if not gate.try_acquire():
+                    logger.warning(f"Shedding {endpoint_class} request: server busy")
+                    return _reject(503, 'Server is busy, please try again shortly',
+                                   current_app.config.get('RATELIMIT_BUSY_RETRY_AFTER', 1))
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    gate.release()
+            return wrapper
+        return decorator
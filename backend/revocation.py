@@ -0,0 +1,101 @@
+"""
+In-memory token revocation list.
+
+Revoked keys (session ids) are kept in a bloom filter backed by an exact dict of
+expiry times, so checking an access token never touches the database: a bloom
+miss answers "not revoked" straight away and only hits are confirmed against
+the dict. Entries only need to outlive the access tokens they block, so they
+expire and are dropped whenever the filter is rebuilt.
+
+Revocations are published to the shared store, and each worker re-reads them
+when the store's version counter moves (checked at most once per sync interval).
+"""
+import hashlib
+import threading
+import time
+
+from shared_store import shared_store
+
+
+class BloomFilter:
+    def __init__(self, size_bits=1 << 20, hashes=4):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(size_bits // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], 'little') % self.size_bits
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Revoked keys shared between workers through `store`"""
+
+    def __init__(self, store=None, size_bits=1 << 20, sync_interval=1.0, namespace='revocations'):
+        self.store = store if store is not None else shared_store
+        self.size_bits = size_bits
+        self.sync_interval = sync_interval
+        self.members_key = f"{namespace}:entries"
+        self.version_key = f"{namespace}:version"
+        self._lock = threading.Lock()
+        # (bloom filter, {key: expires_at}) swapped as one unit on rebuild
+        self._state = (BloomFilter(size_bits), {})
+        self._version = None
+        self._last_sync = 0.0
+
+    def revoke(self, key, expires_at):
+        """Treat `key` as revoked until the unix time `expires_at`"""
+        with self._lock:
+            bloom, exact = self._state
+            bloom.add(key)
+            exact[key] = max(expires_at, exact.get(key, 0))
+
+        now = time.time()
+        self.store.sadd(self.members_key, f"{key}|{expires_at}")
+        for member in self.store.smembers(self.members_key):
+            if float(member.rsplit('|', 1)[1]) <= now:
+                self.store.srem(self.members_key, member)
+        self.store.incr(self.version_key)
+
+    def is_revoked(self, key):
+        if not key:
+            return False
+        self._maybe_sync()
+        bloom, exact = self._state
+        if key not in bloom:
+            return False
+        return exact.get(key, 0) > time.time()
+
+    def _maybe_sync(self):
+        now = time.time()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        version = self.store.get(self.version_key, 0)
+        if version != self._version:
+            self.sync(version)
+
+    def sync(self, version=None):
+        """Rebuild the local filter from the shared store, dropping expired entries"""
+        if version is None:
+            version = self.store.get(self.version_key, 0)
+        now = time.time()
+        bloom = BloomFilter(self.size_bits)
+        exact = {}
+        for member in self.store.smembers(self.members_key):
+            key, expires_at = member.rsplit('|', 1)
+            expires_at = float(expires_at)
+            if expires_at > now:
+                bloom.add(key)
+                exact[key] = max(expires_at, exact.get(key, 0))
+        with self._lock:
+            self._state = (bloom, exact)
+            self._version = version
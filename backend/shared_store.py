@@ -0,0 +1,92 @@
+"""
+Shared key/value store used to coordinate state between workers
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LocalSharedStore:
+    """In-process stand-in for a shared store such as Redis.
+
+    Exposes the small subset of operations the app relies on (get/set with
+    TTL, incr, sets and per-key locks) so that code written against it can be
+    pointed at a real shared backend without changes.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def _expired(self, key, now):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= now:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return True
+        return False
+
+    def get(self, key, default=None):
+        with self._lock:
+            if self._expired(key, time.time()):
+                return default
+            return self._data.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = value
+            if ttl:
+                self._expires[key] = time.time() + ttl
+            else:
+                self._expires.pop(key, None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            self._expired(key, time.time())
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = value
+            if ttl and key not in self._expires:
+                self._expires[key] = time.time() + ttl
+            return value
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._expired(key, time.time())
+            members_set = self._data.setdefault(key, set())
+            before = len(members_set)
+            members_set.update(members)
+            return len(members_set) - before
+
+    def srem(self, key, *members):
+        with self._lock:
+            members_set = self._data.get(key)
+            if not members_set:
+                return 0
+            before = len(members_set)
+            members_set.difference_update(members)
+            return before - len(members_set)
+
+    def smembers(self, key):
+        with self._lock:
+            if self._expired(key, time.time()):
+                return set()
+            return set(self._data.get(key, ()))
+
+    @contextmanager
+    def lock(self, name):
+        """Hold an exclusive lock on `name` for the duration of the block"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+        with key_lock:
+            yield
+
+
+# Single store shared by every component in this process
+shared_store = LocalSharedStore()
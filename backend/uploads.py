@@ -0,0 +1,558 @@
+"""
+Streaming image uploads.
+
+Multipart bodies are decoded incrementally from the request stream instead of
+letting Werkzeug spool the whole body first. Each image part is validated from
+its header (magic number, format header and dimensions) as it streams past and
+is hashed and written chunk by chunk straight to its final file in UPLOAD_FOLDER.
+
+Large images can instead be sent through resumable upload sessions: the client
+opens a session with the total size, then PUTs sequential chunks (each within
+MAX_CONTENT_LENGTH) with a Content-Range header, and receives the stored
+filename once the last chunk arrives.
+"""
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import uuid
+import zlib
+
+from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+
+from shared_store import shared_store
+
+READ_CHUNK_SIZE = 64 * 1024
+# PNG, GIF and WebP headers must be found within this many leading bytes
+SNIFF_LIMIT = 64 * 1024
+# How far into a JPEG to walk looking for its start-of-frame segment
+JPEG_SCAN_LIMIT = 1024 * 1024
+MAX_FIELD_SIZE = 64 * 1024
+
+IMAGE_EXTENSIONS = {'png': 'png', 'jpeg': 'jpg', 'gif': 'gif', 'webp': 'webp'}
+
+PARTIAL_DIR = '.partial'
+# Upload sessions hash onto this many shared-store locks, so the store holds a fixed set
+UPLOAD_LOCK_STRIPES = 64
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class StoredUpload:
+    def __init__(self, filename, size, sha256, image_format, width, height):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.format = image_format
+        self.width = width
+        self.height = height
+
+
+def sniff_image(head):
+    """Identify a PNG, GIF or WebP image from its leading bytes.
+
+    Returns ``(format, width, height)``, or None if more bytes are needed.
+    Raises UploadError if the bytes are not a supported image. JPEGs are left
+    to ImageSniffer, which can look further into the file.
+    """
+    if len(head) < 12:
+        if not any(sig.startswith(head[:len(sig)]) for sig in
+                   (b'\x89PNG\r\n\x1a\n', b'\xff\xd8', b'GIF8', b'RIFF')):
+            raise UploadError('Unsupported image type')
+        return None
+
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(head) < 24:
+            return None
+        if head[12:16] != b'IHDR':
+            raise UploadError('Corrupt PNG image')
+        width, height = struct.unpack('>II', head[16:24])
+        return 'png', width, height
+
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        width, height = struct.unpack('<HH', head[6:10])
+        return 'gif', width, height
+
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        if len(head) < 30:
+            return None
+        chunk = head[12:16]
+        if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+            width, height = struct.unpack('<HH', head[26:30])
+            return 'webp', width & 0x3fff, height & 0x3fff
+        if chunk == b'VP8L' and head[20] == 0x2f:
+            bits = int.from_bytes(head[21:25], 'little')
+            return 'webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+        if chunk == b'VP8X':
+            return ('webp', int.from_bytes(head[24:27], 'little') + 1,
+                    int.from_bytes(head[27:30], 'little') + 1)
+        raise UploadError('Corrupt WebP image')
+
+    raise UploadError('Unsupported image type')
+
+
+class ImageSniffer:
+    """Identifies an image from its bytes as they stream past.
+
+    The format is known from the magic number straight away (``format``), the
+    dimensions once their header has been seen (``info``). A JPEG's dimensions
+    sit in its start-of-frame segment, which can follow large EXIF, ICC or
+    thumbnail segments, so JPEGs are walked segment by segment: only segment
+    headers are buffered and segment bodies are skipped by their declared
+    length, giving up after JPEG_SCAN_LIMIT bytes.
+    """
+
+    def __init__(self):
+        self.format = None
+        self.info = None
+        self.scanned = 0
+        self._buffer = bytearray()
+        self._skip = 0
+
+    def feed(self, data):
+        """Consume the next bytes; returns ``(format, width, height)`` or None"""
+        if self.info is not None:
+            return self.info
+        self.scanned += len(data)
+        if self.format == 'jpeg':
+            return self._walk_jpeg(data)
+
+        self._buffer.extend(data)
+        if self._buffer.startswith(b'\xff\xd8'):
+            self.format = 'jpeg'
+            data, self._buffer = bytes(self._buffer[2:]), bytearray()
+            return self._walk_jpeg(data)
+        head = bytes(self._buffer[:SNIFF_LIMIT])
+        self.info = sniff_image(head)
+        if self.info is None:
+            if len(self._buffer) >= SNIFF_LIMIT:
+                raise UploadError('Could not read image header')
+            return None
+        self.format = self.info[0]
+        self._buffer = None
+        return self.info
+
+    def seek_past(self):
+        """Bytes the JPEG walk is about to skip, for callers that can seek over them"""
+        skip, self._skip = self._skip, 0
+        self.scanned += skip
+        self._check_scan_limit()
+        return skip
+
+    def _check_scan_limit(self):
+        if self.info is None and self.scanned >= JPEG_SCAN_LIMIT:
+            raise UploadError('Could not read image header')
+
+    def _walk_jpeg(self, data):
+        if self._skip >= len(data):
+            self._skip -= len(data)
+            self._check_scan_limit()
+            return None
+        head = bytes(self._buffer) + data[self._skip:]
+        self._skip = 0
+        i = 0
+        while True:
+            if i + 4 > len(head):
+                break
+            if head[i] != 0xff:
+                raise UploadError('Corrupt JPEG image')
+            marker = head[i + 1]
+            if marker == 0xff:
+                i += 1
+                continue
+            if marker == 0x01 or 0xd0 <= marker <= 0xd8:
+                i += 2
+                continue
+            # Start-of-frame markers carry the dimensions (C4, C8 and CC are not SOFs)
+            if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+                if i + 9 > len(head):
+                    break
+                height, width = struct.unpack('>HH', head[i + 5:i + 9])
+                self.info = ('jpeg', width, height)
+                self._buffer = None
+                return self.info
+            if marker == 0xd9:
+                raise UploadError('Corrupt JPEG image')
+            i += 2 + struct.unpack('>H', head[i + 2:i + 4])[0]
+            if i > len(head):
+                self._skip = i - len(head)
+                i = len(head)
+                break
+        self._buffer = bytearray(head[i:])
+        self._check_scan_limit()
+        return None
+
+
+def check_image(info, declared_type=None):
+    """Reject images whose declared type or dimensions are unacceptable"""
+    image_format, width, height = info
+    if declared_type and not declared_type.startswith('image/') and declared_type != 'application/octet-stream':
+        raise UploadError(f'Content type {declared_type} is not an image type')
+    max_dimension = current_app.config['UPLOAD_MAX_IMAGE_DIMENSION']
+    if not width or not height or width > max_dimension or height > max_dimension:
+        raise UploadError(f'Image dimensions must be between 1 and {max_dimension} pixels')
+    if width * height > current_app.config['UPLOAD_MAX_IMAGE_PIXELS']:
+        raise UploadError('Image has too many pixels')
+
+
+def final_filename(original, image_format, prefix=''):
+    """Name an upload the way the app always has, with an extension matching its content.
+
+    A random component keeps same-named uploads in the same second apart, so
+    one upload can never overwrite (or, when rejected, delete) another's file.
+    """
+    stem = os.path.splitext(secure_filename(original or ''))[0] or 'image'
+    return f"{prefix}{int(time.time())}_{uuid.uuid4().hex[:12]}_{stem}.{IMAGE_EXTENSIONS[image_format]}"
+
+
+class ImageStreamWriter:
+    """Validates, hashes and writes one image as its bytes arrive"""
+
+    def __init__(self, folder, original_filename, prefix='', declared_type=None):
+        self.folder = folder
+        self.original_filename = original_filename
+        self.prefix = prefix
+        self.declared_type = declared_type
+        self.head = bytearray()
+        self.sniffer = ImageSniffer()
+        self.info = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.file = None
+        self.path = None
+        self.filename = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > current_app.config['UPLOAD_MAX_IMAGE_SIZE']:
+            raise UploadError('Image is too large', 413)
+        self.digest.update(data)
+        if self.info is None:
+            self.info = self.sniffer.feed(data)
+            if self.info is not None:
+                check_image(self.info, self.declared_type)
+        if self.file is not None:
+            self.file.write(data)
+            return
+
+        # Hold back the first bytes until the format is known, which names the file.
+        # A JPEG whose dimensions come later is written as it arrives and removed
+        # again by abort() if its header turns out to be unacceptable.
+        self.head.extend(data)
+        if self.sniffer.format is None:
+            return
+        self.filename = final_filename(self.original_filename, self.sniffer.format, self.prefix)
+        self.path = os.path.join(self.folder, self.filename)
+        self.file = open(self.path, 'xb')
+        self.file.write(self.head)
+        self.head = None
+
+    def close(self):
+        if self.info is None:
+            raise UploadError('Could not read image header' if self.size else 'Image is empty')
+        self.file.close()
+        return StoredUpload(self.filename, self.size, self.digest.hexdigest(), *self.info)
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def stream_multipart_upload(req, image_fields):
+    """Parse a multipart request body incrementally.
+
+    `image_fields` maps the form field names accepted as images to the filename
+    prefix used when storing them. Returns ``(form, uploads)`` where `uploads`
+    maps field names to StoredUpload. Any stored file is removed again if a
+    later part of the request is rejected.
+    """
+    max_length = current_app.config['MAX_CONTENT_LENGTH']
+    if req.content_length is not None and max_length and req.content_length > max_length:
+        raise UploadError('Request is too large', 413)
+
+    _, options = parse_options_header(req.headers.get('Content-Type', ''))
+    boundary = options.get('boundary')
+    if not boundary:
+        raise UploadError('Missing multipart boundary')
+
+    # The decoder's limit bounds its internal buffer, which holds up to one read beyond what it has emitted
+    decoder = MultipartDecoder(boundary.encode('latin-1'), 2 * READ_CHUNK_SIZE, max_parts=50)
+    form = {}
+    uploads = {}
+    writer = None
+    field_name = None
+    field_value = None
+    total = 0
+    try:
+        while True:
+            chunk = req.stream.read(READ_CHUNK_SIZE)
+            total += len(chunk)
+            if max_length and total > max_length:
+                raise UploadError('Request is too large', 413)
+            decoder.receive_data(chunk or None)
+
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File):
+                    if event.name not in image_fields:
+                        raise UploadError(f'Unexpected file field {event.name}')
+                    writer = None
+                    if event.filename:
+                        declared = parse_options_header(event.headers.get('Content-Type', ''))[0]
+                        writer = ImageStreamWriter(current_app.config['UPLOAD_FOLDER'], event.filename,
+                                                   image_fields[event.name], declared or None)
+                    field_name = event.name
+                elif isinstance(event, Field):
+                    field_name = event.name
+                    field_value = bytearray()
+                    writer = None
+                elif isinstance(event, Data):
+                    if writer is not None:
+                        writer.write(event.data)
+                        if not event.more_data:
+                            uploads[field_name] = writer.close()
+                            writer = None
+                    elif field_value is not None:
+                        field_value.extend(event.data)
+                        if len(field_value) > MAX_FIELD_SIZE:
+                            raise UploadError(f'Form field {field_name} is too large', 413)
+                        if not event.more_data:
+                            form[field_name] = field_value.decode('utf-8', 'replace')
+                            field_value = None
+                event = decoder.next_event()
+
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    except UploadError:
+        _discard(writer, uploads)
+        raise
+    except RequestEntityTooLarge:
+        # The decoder's buffer or part count limit
+        _discard(writer, uploads)
+        raise UploadError('Request is too large', 413)
+    except Exception as e:
+        _discard(writer, uploads)
+        raise UploadError(f'Malformed multipart body: {str(e)}')
+
+    if not isinstance(event, Epilogue):
+        _discard(writer, uploads)
+        raise UploadError('Incomplete multipart body')
+    return form, uploads
+
+
+def _discard(writer, uploads):
+    if writer is not None:
+        writer.abort()
+    for upload in uploads.values():
+        try:
+            os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], upload.filename))
+        except OSError:
+            pass
+
+
+# Resumable upload sessions
+
+def _partial_dir():
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], PARTIAL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _session_paths(upload_id):
+    if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+        raise UploadError('Upload not found', 404)
+    base = os.path.join(_partial_dir(), upload_id)
+    return f"{base}.json", f"{base}.part"
+
+
+def _load_session(upload_id, user_id):
+    meta_path, part_path = _session_paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        raise UploadError('Upload not found', 404)
+    if session['user_id'] != user_id:
+        raise UploadError('Upload not found', 404)
+    return session, meta_path, part_path
+
+
+def _save_session(session, meta_path):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(session, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _remove_session(meta_path, part_path):
+    for path in (meta_path, part_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def purge_expired_sessions():
+    cutoff = time.time() - current_app.config['UPLOAD_SESSION_TTL']
+    partial_dir = _partial_dir()
+    for name in os.listdir(partial_dir):
+        path = os.path.join(partial_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def create_upload_session(user_id, filename, size, prefix='', sha256=None):
+    """Open a resumable upload of `size` bytes and return its public description"""
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError('A positive size is required')
+    if size > current_app.config['UPLOAD_MAX_IMAGE_SIZE']:
+        raise UploadError('Image is too large', 413)
+    purge_expired_sessions()
+
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _session_paths(upload_id)
+    session = {
+        'id': upload_id,
+        'user_id': user_id,
+        'filename': filename or '',
+        'prefix': prefix,
+        'size': size,
+        'received': 0,
+        'sha256': sha256,
+        'image': None,
+    }
+    open(part_path, 'wb').close()
+    _save_session(session, meta_path)
+    return describe_session(session)
+
+
+def describe_session(session):
+    return {
+        'upload_id': session['id'],
+        'size': session['size'],
+        'received': session['received'],
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+        'complete': False,
+    }
+
+
+def get_upload_session(upload_id, user_id):
+    session, _, _ = _load_session(upload_id, user_id)
+    return describe_session(session)
+
+
+def receive_upload_chunk(upload_id, user_id, req):
+    """Append one sequential chunk; returns the session state or, once complete, the stored file"""
+    stripe = zlib.crc32((upload_id or '').encode('utf-8')) % UPLOAD_LOCK_STRIPES
+    with shared_store.lock(f"upload:lock:{stripe}"):
+        session, meta_path, part_path = _load_session(upload_id, user_id)
+
+        match = CONTENT_RANGE_RE.match(req.headers.get('Content-Range', ''))
+        if not match:
+            raise UploadError('Content-Range header of the form "bytes start-end/total" is required')
+        start, end, total = (int(v) for v in match.groups())
+        length = end - start + 1
+        if total != session['size'] or end >= total or length <= 0:
+            raise UploadError('Content-Range does not match the upload', 416)
+        if start != session['received']:
+            # Chunks must arrive in order; tell the client where to resume
+            raise UploadError(f"Expected chunk starting at byte {session['received']}", 409)
+        if length > current_app.config['UPLOAD_CHUNK_SIZE']:
+            raise UploadError('Chunk is too large', 413)
+        if req.content_length is not None and req.content_length != length:
+            raise UploadError('Content-Length does not match Content-Range')
+
+        written = 0
+        with open(part_path, 'r+b') as f:
+            f.seek(start)
+            while written < length:
+                data = req.stream.read(min(READ_CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+            f.truncate(start + written)
+        if written != length:
+            raise UploadError('Chunk body is shorter than its Content-Range')
+        session['received'] += written
+
+        if session['image'] is None:
+            try:
+                info = _sniff_partial(part_path, session['received'])
+                if info is None and session['received'] == session['size']:
+                    raise UploadError('Could not read image header')
+                if info is not None:
+                    check_image(info)
+            except UploadError:
+                _remove_session(meta_path, part_path)
+                raise
+            session['image'] = list(info) if info else None
+
+        if session['received'] < session['size']:
+            _save_session(session, meta_path)
+            return describe_session(session)
+
+        return _finish_session(session, meta_path, part_path)
+
+
+def _sniff_partial(part_path, received):
+    """Sniff the received part of an upload, seeking over skipped JPEG segments"""
+    sniffer = ImageSniffer()
+    with open(part_path, 'rb') as f:
+        while sniffer.info is None and f.tell() < received:
+            skip = sniffer.seek_past()
+            if skip:
+                f.seek(skip, os.SEEK_CUR)
+                continue
+            data = f.read(min(READ_CHUNK_SIZE, received - f.tell()))
+            if not data:
+                break
+            sniffer.feed(data)
+    return sniffer.info
+
+
+def _finish_session(session, meta_path, part_path):
+    digest = hashlib.sha256()
+    with open(part_path, 'rb') as f:
+        for data in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            digest.update(data)
+    sha256 = digest.hexdigest()
+    if session['sha256'] and session['sha256'].lower() != sha256:
+        _remove_session(meta_path, part_path)
+        raise UploadError('Upload checksum mismatch', 422)
+
+    image_format, width, height = session['image']
+    filename = final_filename(session['filename'], image_format, session['prefix'])
+    os.replace(part_path, os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+    _remove_session(meta_path, part_path)
+    return {
+        'upload_id': session['id'],
+        'size': session['size'],
+        'received': session['received'],
+        'complete': True,
+        'filename': filename,
+        'sha256': sha256,
+        'width': width,
+        'height': height,
+    }
@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { Link } from 'react-router-dom';
 import useAuthStore from '../store/authStore';
+import { debugLog } from '../utils/api';
 import './AuthPages.css';
 
 const Login = () => {
@@ -20,7 +21,7 @@ const Login = () => {
     e.preventDefault();
     clearError();
     
-    console.log('🔐 Login: Form submitted with email:', formData.email);
+    debugLog('🔐 Login: Form submitted with email:', formData.email);
     
     // Validate required fields
     if (!formData.email || !formData.password) {
@@ -28,18 +29,18 @@ const Login = () => {
       return;
     }
     
-    console.log('🚀 Login: Calling auth store login...');
+    debugLog('🚀 Login: Calling auth store login...');
     
     try {
       const success = await login(formData.email, formData.password);
-      console.log('📊 Login: Login result:', success);
+      debugLog('📊 Login: Login result:', success);
       
       if (success) {
-        console.log('✅ Login: Login successful, redirecting...');
+        debugLog('✅ Login: Login successful, redirecting...');
         // Force reload to ensure clean state
         window.location.href = '/profile-settings';
       } else {
-        console.log('❌ Login: Login failed - handled by auth store');
+        debugLog('❌ Login: Login failed - handled by auth store');
       }
     } catch (error) {
       console.error('❌ Login: Unexpected error:', error);
@@ -18,23 +18,40 @@ const Portfolio = () => {
   const [messageSent, setMessageSent] = useState(false);
   
   useEffect(() => {
+    let active = true;
+    
     const fetchPortfolio = async () => {
       try {
         setLoading(true);
-        const response = await getPortfolio(userId);
+        // Served from the API cache when available; a background refresh updates it if stale
+        const response = await getPortfolio(userId, {
+          onRevalidate: (fresh) => {
+            if (active) {
+              setPortfolio(fresh.data);
+            }
+          }
+        });
+        if (!active) return;
         setPortfolio(response.data);
         setError(null);
       } catch (error) {
+        if (!active) return;
         setError('Failed to load portfolio');
         console.error(error);
       } finally {
-        setLoading(false);
+        if (active) {
+          setLoading(false);
+        }
       }
     };
     
     if (userId) {
       fetchPortfolio();
     }
+    
+    return () => {
+      active = false;
+    };
   }, [userId]);
 
   const handleContactChange = (e) => {
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import useProfileStore from '../store/profileStore';
 import useAuthStore from '../store/authStore';
 import Header from '../components/Header';
+import { debugLog } from '../utils/api';
 import './Settings.css';
 
 const ProfileSettings = () => {
@@ -20,7 +21,7 @@ const ProfileSettings = () => {
   useEffect(() => {
     if (isAuthenticated()) {
       // Verify if the token actually works
-      console.log("Fetching profile with token:", localStorage.getItem('token'));
+      debugLog('Fetching profile');
       fetchProfile().catch(err => {
         console.error("Error fetching profile:", err);
       });
@@ -79,7 +80,7 @@ const ProfileSettings = () => {
         data.append('bio', formData.bio);
         data.append('profile_image', imageFile);
         
-        console.log("Submitting with FormData:", Object.fromEntries(data.entries()));
+        debugLog("Submitting with FormData:", Object.fromEntries(data.entries()));
         
         const success = await updateProfile(data);
         if (success) {
@@ -94,7 +95,7 @@ const ProfileSettings = () => {
           bio: formData.bio
         };
         
-        console.log("Submitting JSON data:", dataToSubmit);
+        debugLog("Submitting JSON data:", dataToSubmit);
         
         const success = await updateProfile(dataToSubmit);
         if (success) {
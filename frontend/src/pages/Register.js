@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { Link } from 'react-router-dom';
 import useAuthStore from '../store/authStore';
+import { debugLog } from '../utils/api';
 import './AuthPages.css';
 
 const Register = () => {
@@ -42,7 +43,7 @@ const Register = () => {
     e.preventDefault();
     clearError();
     
-    console.log('📝 Register: Form submitted with data:', {
+    debugLog('📝 Register: Form submitted with data:', {
       email: formData.email,
       name: formData.name,
       hasPassword: !!formData.password
@@ -61,18 +62,18 @@ const Register = () => {
       return;
     }
     
-    console.log('🚀 Register: Calling auth store register...');
+    debugLog('🚀 Register: Calling auth store register...');
     
     try {
       const success = await register(formData.email, formData.password, formData.name);
-      console.log('📊 Register: Registration result:', success);
+      debugLog('📊 Register: Registration result:', success);
       
       if (success) {
-        console.log('✅ Register: Registration successful, redirecting...');
+        debugLog('✅ Register: Registration successful, redirecting...');
         // Force reload to ensure clean state
         window.location.href = '/profile-settings';
       } else {
-        console.log('❌ Register: Registration failed - handled by auth store');
+        debugLog('❌ Register: Registration failed - handled by auth store');
       }
     } catch (error) {
       console.error('❌ Register: Unexpected error:', error);
@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import { login as apiLogin, register as apiRegister } from '../utils/api';
+import { login as apiLogin, register as apiRegister, logout as apiLogout, clearApiCache, debugLog } from '../utils/api';
 
 const useAuthStore = create((set, get) => ({
   // =============================================================================
@@ -27,22 +27,24 @@ const useAuthStore = create((set, get) => ({
    * Login user with email and password
    */
   login: async (email, password) => {
-    console.log('🔐 AuthStore: Starting login process');
+    debugLog('🔐 AuthStore: Starting login process');
     set({ loading: true, error: null });
     
     try {
       // Clear any existing auth data first
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
+      clearApiCache();
       
       const result = await apiLogin(email, password);
-      console.log('✅ AuthStore: Login API result:', result);
+      debugLog('✅ AuthStore: Login API result:', { success: result?.success });
       
       if (!result.success) {
         throw new Error(result.error || 'Login failed');
       }
       
-      const { token, user } = result.data;
+      const { token, refresh_token, user } = result.data;
       
       if (!token || !user) {
         throw new Error('Invalid response: missing token or user data');
@@ -50,6 +52,7 @@ const useAuthStore = create((set, get) => ({
       
       // Save to localStorage
       localStorage.setItem('token', token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(user));
       
       // Update state
@@ -60,7 +63,7 @@ const useAuthStore = create((set, get) => ({
         error: null 
       });
       
-      console.log('✅ AuthStore: Login successful');
+      debugLog('✅ AuthStore: Login successful');
       return true;
       
     } catch (error) {
@@ -90,18 +93,20 @@ const useAuthStore = create((set, get) => ({
    * Register new user
    */
   register: async (email, password, name = '') => {
-    console.log('📝 AuthStore: Starting registration process');
+    debugLog('📝 AuthStore: Starting registration process');
     set({ loading: true, error: null });
     
     try {
       // Clear any existing auth data first
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
+      clearApiCache();
       
       const result = await apiRegister(email, password, name);
-      console.log('✅ AuthStore: Registration API result:', result);
-      console.log('🔍 AuthStore: Result type:', typeof result);
-      console.log('🔍 AuthStore: Result properties:', Object.keys(result || {}));
+      debugLog('✅ AuthStore: Registration API result:', { success: result?.success });
+      debugLog('🔍 AuthStore: Result type:', typeof result);
+      debugLog('🔍 AuthStore: Result properties:', Object.keys(result || {}));
       
       if (!result) {
         throw new Error('No response received from server');
@@ -112,7 +117,7 @@ const useAuthStore = create((set, get) => ({
         throw new Error(result.error || 'Registration failed');
       }
       
-      const { token, user } = result.data;
+      const { token, refresh_token, user } = result.data;
       
       if (!token || !user) {
         throw new Error('Invalid response: missing token or user data');
@@ -120,6 +125,7 @@ const useAuthStore = create((set, get) => ({
       
       // Save to localStorage
       localStorage.setItem('token', token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(user));
       
       // Update state
@@ -130,7 +136,7 @@ const useAuthStore = create((set, get) => ({
         error: null 
       });
       
-      console.log('✅ AuthStore: Registration successful');
+      debugLog('✅ AuthStore: Registration successful');
       return true;
       
     } catch (error) {
@@ -162,11 +168,16 @@ const useAuthStore = create((set, get) => ({
    * Logout user
    */
   logout: () => {
-    console.log('🚪 AuthStore: Logging out user');
+    debugLog('🚪 AuthStore: Logging out user');
     
-    // Clear localStorage
+    // Revoke the session server-side (best effort, not awaited)
+    apiLogout(localStorage.getItem('refresh_token'));
+    
+    // Clear localStorage and any cached responses for this user
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
+    clearApiCache();
     
     // Clear state
     set({ 
@@ -191,7 +202,7 @@ const useAuthStore = create((set, get) => ({
     const hasToken = !!state.token;
     const hasStoredToken = !!localStorage.getItem('token');
     
-    console.log('🔍 AuthStore: Authentication check:', {
+    debugLog('🔍 AuthStore: Authentication check:', {
       hasToken,
       hasStoredToken,
       authenticated: hasToken && hasStoredToken
@@ -204,7 +215,7 @@ const useAuthStore = create((set, get) => ({
    * Initialize auth state from localStorage
    */
   initialize: () => {
-    console.log('🚀 AuthStore: Initializing from localStorage');
+    debugLog('🚀 AuthStore: Initializing from localStorage');
     
     try {
       const token = localStorage.getItem('token');
@@ -213,13 +224,14 @@ const useAuthStore = create((set, get) => ({
       if (token && userData) {
         const user = JSON.parse(userData);
         set({ token, user });
-        console.log('✅ AuthStore: Initialized with existing auth data');
+        debugLog('✅ AuthStore: Initialized with existing auth data');
       } else {
-        console.log('ℹ️ AuthStore: No existing auth data found');
+        debugLog('ℹ️ AuthStore: No existing auth data found');
       }
     } catch (error) {
       console.error('❌ AuthStore: Error initializing from localStorage:', error);
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
       set({ token: null, user: null });
     }
@@ -1,5 +1,13 @@
 import { create } from 'zustand';
-import { getProfile, updateProfile } from '../utils/api';
+import { getProfile, updateProfile, mutateCache, setCachedData, PROFILE_PATH, debugLog } from '../utils/api';
+
+// Text fields of a profile update, applied before the server confirms it
+const optimisticFields = (profileData) => {
+  const entries = profileData instanceof FormData
+    ? Array.from(profileData.entries()).filter(([, value]) => typeof value === 'string')
+    : Object.entries(profileData || {});
+  return Object.fromEntries(entries.filter(([key]) => ['name', 'job_title', 'bio'].includes(key)));
+};
 
 const useProfileStore = create((set, get) => ({
   // =============================================================================
@@ -17,12 +25,15 @@ const useProfileStore = create((set, get) => ({
    * Fetch user profile
    */
   fetchProfile: async () => {
-    console.log('👤 ProfileStore: Fetching user profile');
-    set({ loading: true, error: null });
+    debugLog('👤 ProfileStore: Fetching user profile');
+    // Only show the loading state when there is nothing to display yet
+    set({ loading: !get().profile, error: null });
     
     try {
-      const result = await getProfile();
-      console.log('✅ ProfileStore: Profile fetch result:', result);
+      const result = await getProfile({
+        onRevalidate: (fresh) => set({ profile: fresh.data })
+      });
+      debugLog('✅ ProfileStore: Profile fetch result:', result);
       
       if (!result.success) {
         throw new Error(result.error || 'Failed to fetch profile');
@@ -37,7 +48,7 @@ const useProfileStore = create((set, get) => ({
         error: null 
       });
       
-      console.log('✅ ProfileStore: Profile loaded successfully');
+      debugLog('✅ ProfileStore: Profile loaded successfully');
       return true;
       
     } catch (error) {
@@ -66,12 +77,19 @@ const useProfileStore = create((set, get) => ({
    * Update user profile
    */
   updateProfile: async (profileData) => {
-    console.log('💾 ProfileStore: Updating user profile');
-    set({ loading: true, error: null });
+    debugLog('💾 ProfileStore: Updating user profile');
+    const previousProfile = get().profile;
+    const optimistic = optimisticFields(profileData);
+    set({
+      loading: true,
+      error: null,
+      profile: previousProfile ? { ...previousProfile, ...optimistic } : previousProfile
+    });
+    const previousCached = mutateCache(PROFILE_PATH, (profile) => ({ ...profile, ...optimistic }));
     
     try {
       const result = await updateProfile(profileData);
-      console.log('✅ ProfileStore: Profile update result:', result);
+      debugLog('✅ ProfileStore: Profile update result:', result);
       
       if (!result.success) {
         throw new Error(result.error || 'Failed to update profile');
@@ -86,12 +104,17 @@ const useProfileStore = create((set, get) => ({
         error: null 
       });
       
-      console.log('✅ ProfileStore: Profile updated successfully');
+      debugLog('✅ ProfileStore: Profile updated successfully');
       return true;
       
     } catch (error) {
       console.error('❌ ProfileStore: Profile update failed:', error);
       
+      // Roll back the optimistic update
+      if (previousCached !== undefined) {
+        setCachedData(PROFILE_PATH, previousCached);
+      }
+      
       let errorMessage = 'Failed to update profile';
       if (error.code === 401) {
         errorMessage = 'Please log in to update your profile';
@@ -105,7 +128,8 @@ const useProfileStore = create((set, get) => ({
       
       set({ 
         loading: false, 
-        error: errorMessage
+        error: errorMessage,
+        profile: previousProfile
       });
       
       return false;
@@ -123,7 +147,7 @@ const useProfileStore = create((set, get) => ({
    * Reset profile state
    */
   resetProfile: () => {
-    console.log('🔄 ProfileStore: Resetting profile state');
+    debugLog('🔄 ProfileStore: Resetting profile state');
     set({ 
       profile: null, 
       loading: false, 
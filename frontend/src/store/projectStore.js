@@ -1,5 +1,21 @@
 import { create } from 'zustand';
-import { getProjects, addProject, updateProject, deleteProject } from '../utils/api';
+import {
+  getProjects,
+  addProject,
+  updateProject,
+  deleteProject,
+  mutateCache,
+  setCachedData,
+  PROJECTS_PATH
+} from '../utils/api';
+
+// Text fields of a project update, applied before the server confirms it
+const optimisticFields = (projectData) => {
+  const entries = projectData instanceof FormData
+    ? Array.from(projectData.entries()).filter(([, value]) => typeof value === 'string')
+    : Object.entries(projectData || {});
+  return Object.fromEntries(entries.filter(([key]) => ['name', 'demo_url', 'repo_url', 'description'].includes(key)));
+};
 
 const useProjectStore = create((set, get) => ({
   projects: [],
@@ -7,9 +23,12 @@ const useProjectStore = create((set, get) => ({
   error: null,
   
   fetchProjects: async () => {
-    set({ loading: true, error: null });
+    // Cached projects render immediately; only show loading on the first fetch
+    set({ loading: get().projects.length === 0, error: null });
     try {
-      const response = await getProjects();
+      const response = await getProjects({
+        onRevalidate: (fresh) => set({ projects: fresh.data })
+      });
       set({ projects: response.data, loading: false });
       return response.data;
     } catch (error) {
@@ -49,7 +68,11 @@ const useProjectStore = create((set, get) => ({
   },
   
   updateProject: async (projectId, projectData) => {
-    set({ loading: true, error: null });
+    const previousProjects = get().projects;
+    const optimistic = optimisticFields(projectData);
+    const applyOptimistic = (projects) => projects.map(p => (p.id === projectId ? { ...p, ...optimistic } : p));
+    set({ loading: true, error: null, projects: applyOptimistic(previousProjects) });
+    const previousCached = mutateCache(PROJECTS_PATH, applyOptimistic);
     try {
       const response = await updateProject(projectId, projectData);
       const updatedProject = response.data.project;
@@ -62,27 +85,37 @@ const useProjectStore = create((set, get) => ({
       });
       return true;
     } catch (error) {
+      // Roll back the optimistic update
+      if (previousCached !== undefined) {
+        setCachedData(PROJECTS_PATH, previousCached);
+      }
       set({
         error: error.response?.data?.error || 'Failed to update project',
-        loading: false
+        loading: false,
+        projects: previousProjects
       });
       return false;
     }
   },
   
   deleteProject: async (projectId) => {
-    set({ loading: true, error: null });
+    const previousProjects = get().projects;
+    const removeProject = (projects) => projects.filter(p => p.id !== projectId);
+    set({ loading: true, error: null, projects: removeProject(previousProjects) });
+    const previousCached = mutateCache(PROJECTS_PATH, removeProject);
     try {
       await deleteProject(projectId);
-      set({ 
-        projects: get().projects.filter(p => p.id !== projectId),
-        loading: false 
-      });
+      set({ loading: false });
       return true;
     } catch (error) {
+      // Roll back the optimistic delete
+      if (previousCached !== undefined) {
+        setCachedData(PROJECTS_PATH, previousCached);
+      }
       set({
         error: error.response?.data?.error || 'Failed to delete project',
-        loading: false
+        loading: false,
+        projects: previousProjects
       });
       return false;
     }
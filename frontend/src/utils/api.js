@@ -13,10 +13,19 @@ const getApiBaseUrl = () => {
 
 const API_BASE_URL = getApiBaseUrl();
 
-console.log('=== API Configuration ===');
-console.log('API Base URL:', API_BASE_URL);
-console.log('Environment:', process.env.NODE_ENV);
-console.log('Window location:', typeof window !== 'undefined' ? window.location.origin : 'N/A');
+// Verbose logging is for development only. NODE_ENV is replaced at build time,
+// so the minifier drops these calls from production bundles.
+const DEBUG = process.env.NODE_ENV !== 'production';
+export const debugLog = (...args) => {
+  if (DEBUG) {
+    console.log(...args);
+  }
+};
+
+debugLog('=== API Configuration ===');
+debugLog('API Base URL:', API_BASE_URL);
+debugLog('Environment:', process.env.NODE_ENV);
+debugLog('Window location:', typeof window !== 'undefined' ? window.location.origin : 'N/A');
 
 // Create axios instance
 const api = axios.create({
@@ -32,10 +41,10 @@ const api = axios.create({
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
-    console.log(`🚀 API Request: ${config.method?.toUpperCase()} ${config.baseURL}${config.url}`);
+    debugLog(`🚀 API Request: ${config.method?.toUpperCase()} ${config.baseURL}${config.url}`);
     
     // Auth endpoints that don't need token
-    const authEndpoints = ['/user/signup', '/user/login', '/user/forgot-password', '/user/reset-password'];
+    const authEndpoints = ['/user/signup', '/user/login', '/user/forgot-password', '/user/reset-password', '/user/token/refresh'];
     const isAuthEndpoint = authEndpoints.some(endpoint => config.url?.includes(endpoint));
     
     // Add authorization header for protected endpoints
@@ -43,15 +52,15 @@ api.interceptors.request.use(
     const token = localStorage.getItem('token');
     if (token) {
       config.headers['Authorization'] = `Bearer ${token}`;
-        console.log('🔐 Added auth token to request');
+        debugLog('🔐 Added auth token to request');
       }
     } else {
-      console.log('🔓 Auth endpoint - no token needed');
+      debugLog('🔓 Auth endpoint - no token needed');
     }
     
     // Log request data for debugging
-    if (config.data && !(config.data instanceof FormData)) {
-      console.log('📤 Request data:', config.data);
+    if (DEBUG && config.data && !(config.data instanceof FormData)) {
+      debugLog('📤 Request data:', config.data);
     }
     
     return config;
@@ -62,53 +71,211 @@ api.interceptors.request.use(
   }
 );
 
+// Drop stored credentials and send the user to the login page
+const clearAuthAndRedirect = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('user');
+  clearApiCache();
+  
+  // Don't redirect if we're already on auth pages
+  if (!window.location.pathname.includes('/login') && 
+      !window.location.pathname.includes('/register')) {
+    window.location.href = '/login';
+  }
+};
+
+// Access tokens are short-lived; exchange the stored refresh token for a new pair.
+// Each refresh token can only be used once (the server revokes the whole session if
+// one is replayed), so concurrent callers share one refresh request and tabs refresh
+// one at a time: through the Web Locks API where the browser has it, otherwise
+// through a best-effort lock in localStorage. A tab that gets the lock after another
+// tab has already rotated the pair uses the stored pair instead of refreshing again.
+const REFRESH_LOCK_NAME = 'portfolio-token-refresh';
+const REFRESH_LOCK_KEY = 'refresh_lock';
+const REFRESH_LOCK_TTL = 10000;
+// How long a tab waits after writing the fallback lock before checking it still owns it
+const REFRESH_LOCK_SETTLE = 50;
+const tabId = Math.random().toString(36).slice(2);
+let refreshPromise = null;
+
+const readRefreshLock = () => {
+  try {
+    const lock = JSON.parse(localStorage.getItem(REFRESH_LOCK_KEY));
+    return lock && Date.now() - lock.at < REFRESH_LOCK_TTL ? lock : null;
+  } catch (error) {
+    return null;
+  }
+};
+
+// The access token stored by another tab, if it rotated the refresh token since we read it
+const tokenRotatedElsewhere = (refreshToken) => {
+  const current = localStorage.getItem('refresh_token');
+  return current && current !== refreshToken ? localStorage.getItem('token') : null;
+};
+
+// Resolves once the other tab's lock is released or expires, or it stores a new pair
+const waitForOtherTab = (refreshToken) => new Promise((resolve) => {
+  const check = () => {
+    const lock = readRefreshLock();
+    if (!lock || lock.owner === tabId || tokenRotatedElsewhere(refreshToken)) {
+      window.removeEventListener('storage', check);
+      clearInterval(timer);
+      resolve();
+    }
+  };
+  const timer = setInterval(check, 250);
+  window.addEventListener('storage', check);
+});
+
+// Exchange `refreshToken` for a new pair; must be called while holding the refresh lock
+const exchangeRefreshToken = async (refreshToken) => {
+  const token = tokenRotatedElsewhere(refreshToken);
+  if (token) {
+    return token;
+  }
+  if (localStorage.getItem('refresh_token') !== refreshToken) {
+    throw new Error('No refresh token');
+  }
+  
+  let response;
+  try {
+    response = await axios.post(`${API_BASE_URL}/user/token/refresh`, null, {
+      headers: { Authorization: `Bearer ${refreshToken}` }
+    });
+  } catch (error) {
+    // Another tab may have rotated the pair after all; its tokens are still good
+    const rotated = tokenRotatedElsewhere(refreshToken);
+    if (rotated) {
+      return rotated;
+    }
+    throw error;
+  }
+  
+  const { token: accessToken, refresh_token } = response.data.data;
+  localStorage.setItem('token', accessToken);
+  localStorage.setItem('refresh_token', refresh_token);
+  debugLog('🔄 Access token refreshed');
+  return accessToken;
+};
+
+// Fallback for browsers without Web Locks. Writing the lock and reading it back are
+// separate steps, so after writing it a tab waits briefly and backs off if another
+// tab's write landed last.
+const withStorageLock = async (refreshToken, task) => {
+  for (;;) {
+    const lock = readRefreshLock();
+    if (lock && lock.owner !== tabId) {
+      debugLog('⏳ Waiting for another tab to refresh the access token');
+      await waitForOtherTab(refreshToken);
+      const token = tokenRotatedElsewhere(refreshToken);
+      if (token) {
+        return token;
+      }
+      continue;
+    }
+    
+    localStorage.setItem(REFRESH_LOCK_KEY, JSON.stringify({ owner: tabId, at: Date.now() }));
+    await new Promise((resolve) => setTimeout(resolve, REFRESH_LOCK_SETTLE));
+    if (readRefreshLock()?.owner !== tabId) {
+      continue;
+    }
+    try {
+      return await task();
+    } finally {
+      if (readRefreshLock()?.owner === tabId) {
+        localStorage.removeItem(REFRESH_LOCK_KEY);
+      }
+    }
+  }
+};
+
+const runRefresh = async () => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  
+  const task = () => exchangeRefreshToken(refreshToken);
+  if (typeof navigator !== 'undefined' && navigator.locks) {
+    return navigator.locks.request(REFRESH_LOCK_NAME, task);
+  }
+  return withStorageLock(refreshToken, task);
+};
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    refreshPromise = runRefresh().finally(() => {
+      refreshPromise = null;
+    });
+  }
+  return refreshPromise;
+};
+
 // Response interceptor
 api.interceptors.response.use(
   (response) => {
-    console.log(`✅ API Response: ${response.status} ${response.config.method?.toUpperCase()} ${response.config.url}`);
-    console.log('📥 Raw response data:', response.data);
-    console.log('📥 Response headers:', response.headers);
-    console.log('📥 Response type:', typeof response.data);
-    console.log('📥 Response content-type:', response.headers['content-type']);
-    
-    // Validate response data
-    if (!response.data) {
-      console.warn('⚠️ Response has no data');
-    }
-    
-    // Validate response is JSON
-    const contentType = response.headers['content-type'];
-    if (contentType && !contentType.includes('application/json')) {
-      console.warn('⚠️ Response is not JSON:', contentType);
+    if (DEBUG) {
+      debugLog(`✅ API Response: ${response.status} ${response.config.method?.toUpperCase()} ${response.config.url}`);
+      debugLog('📥 Raw response data:', response.data);
+      debugLog('📥 Response headers:', response.headers);
+      
+      // Validate response data (304 revalidations have no body)
+      if (!response.data && response.status !== 304) {
+        console.warn('⚠️ Response has no data');
+      }
+      
+      // Validate response is JSON
+      const contentType = response.headers['content-type'];
+      if (contentType && !contentType.includes('application/json')) {
+        console.warn('⚠️ Response is not JSON:', contentType);
+      }
     }
     
     return response;
   },
   (error) => {
     console.error(`❌ API Error: ${error.response?.status} ${error.config?.method?.toUpperCase()} ${error.config?.url}`);
-    console.error('❌ Full error object:', error);
     
     if (error.response) {
-      console.error('Error response data:', error.response.data);
-      console.error('Error response headers:', error.response.headers);
-      console.error('Error response status:', error.response.status);
+      if (DEBUG) {
+        console.error('Error response data:', error.response.data);
+        console.error('Error response headers:', error.response.headers);
+      }
+      
+      // Expired access token: refresh it once and retry the request
+      const originalRequest = error.config;
+      if (error.response.status === 401 &&
+          error.response.data?.error === 'token_expired' &&
+          originalRequest && !originalRequest._retried &&
+          localStorage.getItem('refresh_token')) {
+        originalRequest._retried = true;
+        // Only a failed refresh ends the session; errors from the retried
+        // request itself reach the caller unchanged
+        return refreshAccessToken().catch((refreshError) => {
+          debugLog('🚪 Token refresh failed:', refreshError.message);
+          // A network failure leaves the session alone; a rejected refresh token ends it
+          if (refreshError.response || !refreshError.request) {
+            clearAuthAndRedirect();
+          }
+          return Promise.reject(error);
+        }).then((token) => {
+          originalRequest.headers['Authorization'] = `Bearer ${token}`;
+          return api(originalRequest);
+        });
+      }
       
       // Handle 401 - Unauthorized
       if (error.response.status === 401) {
-        console.log('🚪 Unauthorized - clearing auth and redirecting');
-        localStorage.removeItem('token');
-        localStorage.removeItem('user');
-        
-        // Don't redirect if we're already on auth pages
-        if (!window.location.pathname.includes('/login') && 
-            !window.location.pathname.includes('/register')) {
-        window.location.href = '/login';
-      }
+        debugLog('🚪 Unauthorized - clearing auth and redirecting');
+        clearAuthAndRedirect();
       }
     } else if (error.request) {
-      console.error('🌐 Network error - no response received:', error.request);
-      console.error('🌐 Request status:', error.request.status);
-      console.error('🌐 Request ready state:', error.request.readyState);
+      console.error('🌐 Network error - no response received');
+      if (DEBUG) {
+        console.error('🌐 Request status:', error.request.status);
+        console.error('🌐 Request ready state:', error.request.readyState);
+      }
     } else {
       console.error('⚙️ Request setup error:', error.message);
     }
@@ -121,11 +288,11 @@ api.interceptors.response.use(
 const handleResponse = (response) => {
   const data = response.data;
   
-  console.log('🔍 Parsing API response:', data);
+  debugLog('🔍 Parsing API response:', data);
   
   // Handle new standardized response format
   if (data && typeof data === 'object' && data.success !== undefined) {
-    console.log('📋 Using standardized response format');
+    debugLog('📋 Using standardized response format');
     if (data.success) {
       return {
         success: true,
@@ -138,7 +305,7 @@ const handleResponse = (response) => {
   }
   
   // Handle legacy response format (direct data)
-  console.log('📋 Using legacy response format');
+  debugLog('📋 Using legacy response format');
   return {
     success: true,
     data: data,
@@ -151,20 +318,22 @@ const handleError = (error) => {
   let errorMessage = 'An unexpected error occurred';
   let errorCode = null;
   
-  console.error('🔍 Error analysis:', {
-    hasResponse: !!error.response,
-    hasRequest: !!error.request,
-    message: error.message,
-    code: error.code,
-    status: error.response?.status
-  });
+  if (DEBUG) {
+    console.error('🔍 Error analysis:', {
+      hasResponse: !!error.response,
+      hasRequest: !!error.request,
+      message: error.message,
+      code: error.code,
+      status: error.response?.status
+    });
+  }
   
   if (error.response) {
     // Server responded with error status
     errorCode = error.response.status;
     const errorData = error.response.data;
     
-    console.log('📥 Error response data:', errorData);
+    debugLog('📥 Error response data:', errorData);
     
     if (errorData && errorData.error) {
       errorMessage = errorData.error;
@@ -175,9 +344,10 @@ const handleError = (error) => {
     }
   } else if (error.request) {
     // Request was made but no response received
-    console.error('🌐 Request made but no response:', error.request);
-    console.error('🌐 Request status:', error.request.status);
-    console.error('🌐 Request response text:', error.request.responseText);
+    if (DEBUG) {
+      console.error('🌐 Request made but no response:', error.request);
+      console.error('🌐 Request response text:', error.request.responseText);
+    }
     
     if (error.code === 'ECONNABORTED') {
       errorMessage = 'Request timeout. Please try again.';
@@ -199,13 +369,156 @@ const handleError = (error) => {
   };
 };
 
+// =============================================================================
+// RESPONSE CACHE
+// =============================================================================
+
+export const PROFILE_PATH = '/user/profile';
+export const PROJECTS_PATH = '/user/projects';
+export const portfolioPath = (userId) => `/portfolio/${userId}`;
+
+// Cached GET responses are served immediately and revalidated in the background once older than this
+const CACHE_MAX_AGE_MS = 30 * 1000;
+
+const responseCache = new Map(); // url -> { data, etag, fetchedAt }
+const inflightRequests = new Map(); // url -> Promise<entry>
+let cacheGeneration = 0;
+
+// A response still in flight when its URL is mutated or invalidated describes older
+// state; later callers must start a new request instead of joining it
+const dropInflight = (matches) => {
+  for (const url of inflightRequests.keys()) {
+    if (matches(url)) {
+      inflightRequests.delete(url);
+    }
+  }
+};
+
+/**
+ * Fetch `url`, sharing one request between concurrent callers.
+ * Sends If-None-Match when the cached entry has an ETag and keeps the cached
+ * data on 304 Not Modified.
+ */
+const revalidate = (url) => {
+  if (inflightRequests.has(url)) {
+    return inflightRequests.get(url);
+  }
+  
+  const cached = responseCache.get(url);
+  const generation = cacheGeneration;
+  const request = api.get(url, {
+    headers: cached?.etag ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304
+  }).then((response) => {
+    // Don't let a response that started before a mutation or cache clear overwrite newer state
+    const current = generation === cacheGeneration && responseCache.get(url) === cached;
+    if (response.status === 304 && cached) {
+      if (current) {
+        cached.fetchedAt = Date.now();
+      }
+      return cached;
+    }
+    const entry = { data: response.data, etag: response.headers.etag || null, fetchedAt: Date.now() };
+    if (current) {
+      responseCache.set(url, entry);
+    }
+    return entry;
+  }).finally(() => {
+    if (inflightRequests.get(url) === request) {
+      inflightRequests.delete(url);
+    }
+  });
+  
+  inflightRequests.set(url, request);
+  return request;
+};
+
+/**
+ * Stale-while-revalidate GET: resolves with cached data right away when there is
+ * any, refreshing it in the background if it is stale; `onRevalidate` receives
+ * the fresh data if it changed.
+ */
+const cachedGet = async (url, { onRevalidate } = {}) => {
+  const cached = responseCache.get(url);
+  if (cached) {
+    if (Date.now() - cached.fetchedAt > CACHE_MAX_AGE_MS) {
+      revalidate(url)
+        .then((entry) => {
+          // Only report data that made it into the cache, not a response overtaken by a mutation
+          if (entry !== cached && onRevalidate && responseCache.get(url) === entry) {
+            onRevalidate(entry.data);
+          }
+        })
+        .catch((error) => debugLog(`⚠️ Background revalidation of ${url} failed:`, error.message));
+    }
+    debugLog(`📦 Cache hit: ${url}`);
+    return { data: cached.data, status: 200, cached: true };
+  }
+  
+  const entry = await revalidate(url);
+  return { data: entry.data, status: 200, cached: false };
+};
+
+/**
+ * Apply `updater` to the cached data for `url` (used for optimistic updates).
+ * Returns the previous data so callers can roll back.
+ */
+export const mutateCache = (url, updater) => {
+  const cached = responseCache.get(url);
+  if (!cached) {
+    return undefined;
+  }
+  // The ETag no longer describes this data, so don't revalidate against it
+  responseCache.set(url, { data: updater(cached.data), etag: null, fetchedAt: Date.now() });
+  dropInflight((key) => key === url);
+  return cached.data;
+};
+
+/**
+ * Replace the cached data for `url`
+ */
+export const setCachedData = (url, data) => {
+  responseCache.set(url, { data, etag: null, fetchedAt: Date.now() });
+  dropInflight((key) => key === url);
+};
+
+/**
+ * Drop cached entries whose URL starts with `prefix`
+ */
+export const invalidateCache = (prefix) => {
+  for (const url of responseCache.keys()) {
+    if (url.startsWith(prefix)) {
+      responseCache.delete(url);
+    }
+  }
+  dropInflight((url) => url.startsWith(prefix));
+};
+
+/**
+ * Forget everything, e.g. when the logged-in user changes
+ */
+export const clearApiCache = () => {
+  cacheGeneration += 1;
+  responseCache.clear();
+  inflightRequests.clear();
+};
+
+// Adapts a store callback to receive data in the same shape as the API functions return
+const withResponseFormat = (onRevalidate) => onRevalidate && ((data) => {
+  try {
+    onRevalidate(handleResponse({ data }));
+  } catch (error) {
+    debugLog('⚠️ Ignoring unusable revalidated response:', error.message);
+  }
+});
+
 // =============================================================================
 // AUTH API FUNCTIONS
 // =============================================================================
 
 export const login = async (email, password) => {
   try {
-    console.log('🔐 Attempting login...');
+    debugLog('🔐 Attempting login...');
     const response = await api.post('/user/login', { email, password });
     return handleResponse(response);
   } catch (error) {
@@ -215,8 +528,8 @@ export const login = async (email, password) => {
 
 export const register = async (email, password, name = '') => {
   try {
-    console.log('📝 API: Attempting registration...');
-    console.log('📝 API: Registration data:', { email, name: name || '', hasPassword: !!password });
+    debugLog('📝 API: Attempting registration...');
+    debugLog('📝 API: Registration data:', { email, name: name || '', hasPassword: !!password });
     
     const response = await api.post('/user/signup', { 
       email, 
@@ -224,29 +537,42 @@ export const register = async (email, password, name = '') => {
       name: name || '' 
     });
     
-    console.log('✅ API: Registration response received');
-    console.log('✅ API: Response status:', response.status);
-    console.log('✅ API: Response data:', response.data);
+    debugLog('✅ API: Registration response received');
+    debugLog('✅ API: Response status:', response.status);
     
     const result = handleResponse(response);
-    console.log('✅ API: Processed result:', result);
+    debugLog('✅ API: Processed result:', result);
     
     return result;
   } catch (error) {
-    console.error('❌ API: Registration error occurred:', error);
-    console.error('❌ API: Error type:', error.constructor.name);
-    console.error('❌ API: Error message:', error.message);
-    
     const handledError = handleError(error);
-    console.error('❌ API: Handled error:', handledError);
+    console.error('❌ API: Registration failed:', handledError.error);
     
     throw handledError;
   }
 };
 
+/**
+ * Revoke the current session on the server. Uses the refresh token directly so it
+ * works after local auth data has been cleared and even if the access token expired.
+ */
+export const logout = async (refreshToken) => {
+  if (!refreshToken) {
+    return;
+  }
+  try {
+    debugLog('🚪 Revoking session...');
+    await axios.post(`${API_BASE_URL}/user/logout`, null, {
+      headers: { Authorization: `Bearer ${refreshToken}` }
+    });
+  } catch (error) {
+    debugLog('⚠️ Session revocation failed:', error.message);
+  }
+};
+
 export const forgotPassword = async (email) => {
   try {
-    console.log('🔄 Requesting password reset...');
+    debugLog('🔄 Requesting password reset...');
     const response = await api.post('/user/forgot-password', { email });
     return handleResponse(response);
   } catch (error) {
@@ -256,7 +582,7 @@ export const forgotPassword = async (email) => {
 
 export const resetPassword = async (token, password) => {
   try {
-    console.log('🔑 Resetting password...');
+    debugLog('🔑 Resetting password...');
     const response = await api.post('/user/reset-password', { token, password });
     return handleResponse(response);
   } catch (error) {
@@ -268,10 +594,10 @@ export const resetPassword = async (token, password) => {
 // PROFILE API FUNCTIONS
 // =============================================================================
 
-export const getProfile = async () => {
+export const getProfile = async ({ onRevalidate } = {}) => {
   try {
-    console.log('👤 Fetching user profile...');
-    const response = await api.get('/user/profile');
+    debugLog('👤 Fetching user profile...');
+    const response = await cachedGet(PROFILE_PATH, { onRevalidate: withResponseFormat(onRevalidate) });
     return handleResponse(response);
   } catch (error) {
     throw handleError(error);
@@ -280,7 +606,7 @@ export const getProfile = async () => {
 
 export const updateProfile = async (profileData) => {
   try {
-    console.log('💾 Updating user profile...');
+    debugLog('💾 Updating user profile...');
     
     // Handle FormData vs JSON
   const isFormData = profileData instanceof FormData;
@@ -288,8 +614,13 @@ export const updateProfile = async (profileData) => {
       headers: { 'Content-Type': 'multipart/form-data' }
     } : {};
     
-    const response = await api.put('/user/profile', profileData, config);
-    return handleResponse(response);
+    const response = await api.put(PROFILE_PATH, profileData, config);
+    const result = handleResponse(response);
+    
+    const { message, ...profile } = result.data;
+    setCachedData(PROFILE_PATH, profile);
+    invalidateCache('/portfolio/');
+    return result;
   } catch (error) {
     throw handleError(error);
   }
@@ -299,10 +630,10 @@ export const updateProfile = async (profileData) => {
 // PROJECTS API FUNCTIONS
 // =============================================================================
 
-export const getProjects = async () => {
+export const getProjects = async ({ onRevalidate } = {}) => {
   try {
-    console.log('📁 Fetching user projects...');
-    const response = await api.get('/user/projects');
+    debugLog('📁 Fetching user projects...');
+    const response = await cachedGet(PROJECTS_PATH, { onRevalidate: withResponseFormat(onRevalidate) });
     return handleResponse(response);
   } catch (error) {
     throw handleError(error);
@@ -311,15 +642,20 @@ export const getProjects = async () => {
 
 export const addProject = async (projectData) => {
   try {
-    console.log('➕ Adding new project...');
+    debugLog('➕ Adding new project...');
     
   const isFormData = projectData instanceof FormData;
     const config = isFormData ? {
       headers: { 'Content-Type': 'multipart/form-data' }
     } : {};
     
-    const response = await api.post('/user/projects', projectData, config);
-    return handleResponse(response);
+    const response = await api.post(PROJECTS_PATH, projectData, config);
+    const result = handleResponse(response);
+    
+    const { message, ...project } = result.data;
+    mutateCache(PROJECTS_PATH, (projects) => [...projects, project]);
+    invalidateCache('/portfolio/');
+    return result;
   } catch (error) {
     throw handleError(error);
   }
@@ -327,15 +663,20 @@ export const addProject = async (projectData) => {
 
 export const updateProject = async (projectId, projectData) => {
   try {
-    console.log(`✏️ Updating project ${projectId}...`);
+    debugLog(`✏️ Updating project ${projectId}...`);
     
   const isFormData = projectData instanceof FormData;
     const config = isFormData ? {
       headers: { 'Content-Type': 'multipart/form-data' }
     } : {};
     
-    const response = await api.put(`/user/projects/${projectId}`, projectData, config);
-    return handleResponse(response);
+    const response = await api.put(`${PROJECTS_PATH}/${projectId}`, projectData, config);
+    const result = handleResponse(response);
+    
+    const updatedProject = result.data.project;
+    mutateCache(PROJECTS_PATH, (projects) => projects.map(p => (p.id === projectId ? updatedProject : p)));
+    invalidateCache('/portfolio/');
+    return result;
   } catch (error) {
     throw handleError(error);
   }
@@ -343,9 +684,13 @@ export const updateProject = async (projectId, projectData) => {
 
 export const deleteProject = async (projectId) => {
   try {
-    console.log(`🗑️ Deleting project ${projectId}...`);
-    const response = await api.delete(`/user/projects/${projectId}`);
-    return handleResponse(response);
+    debugLog(`🗑️ Deleting project ${projectId}...`);
+    const response = await api.delete(`${PROJECTS_PATH}/${projectId}`);
+    const result = handleResponse(response);
+    
+    mutateCache(PROJECTS_PATH, (projects) => projects.filter(p => p.id !== projectId));
+    invalidateCache('/portfolio/');
+    return result;
   } catch (error) {
     throw handleError(error);
   }
@@ -355,10 +700,10 @@ export const deleteProject = async (projectId) => {
 // PORTFOLIO API FUNCTIONS
 // =============================================================================
 
-export const getPortfolio = async (userId) => {
+export const getPortfolio = async (userId, { onRevalidate } = {}) => {
   try {
-    console.log(`🎨 Fetching portfolio for user ${userId}...`);
-    const response = await api.get(`/portfolio/${userId}`);
+    debugLog(`🎨 Fetching portfolio for user ${userId}...`);
+    const response = await cachedGet(portfolioPath(userId), { onRevalidate: withResponseFormat(onRevalidate) });
     return handleResponse(response);
   } catch (error) {
     throw handleError(error);
@@ -367,7 +712,7 @@ export const getPortfolio = async (userId) => {
 
 export const sendContactMessage = async (userId, messageData) => {
   try {
-    console.log(`📧 Sending contact message to user ${userId}...`);
+    debugLog(`📧 Sending contact message to user ${userId}...`);
     const response = await api.post('/contact', { 
       user_id: userId, 
       ...messageData 